@@ -1,12 +1,22 @@
+from tracedata import make_block
+
+
 class AgilentN5230AMock:
 
     def __init__(self):
-        pass
+        self._buffer = b''
 
     def write(self, command):
+        if '?' in command:
+            self._buffer = b';'.join(make_block([42.0]) for _ in range(command.count('?'))) + b'\n'
         return 'success'
 
     def query(self, question):
+        if question.upper().startswith('SYST:ERR'):
+            return '+0,"No error"'
         answer = '42'
         return answer
 
+    def read_bytes(self, count):
+        chunk, self._buffer = self._buffer[:count], self._buffer[count:]
+        return chunk
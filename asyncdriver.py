@@ -0,0 +1,176 @@
+import asyncio
+import functools
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from rigsession import RigSession
+from tracing import tracer
+
+
+class AsyncInstrument:
+    # every operation on an instrument goes through its own single worker: one serialized queue per instrument
+
+    def __init__(self, instrument, label):
+        self._instrument = instrument
+        self.label = label
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'io-{label}')
+
+    async def run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def send(self, command):
+        return await self.run(self._instrument.send, command)
+
+    async def query(self, question):
+        return await self.run(self._instrument.query, question)
+
+    def __getattr__(self, item):
+        attr = getattr(self._instrument, item)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+        return call
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+class AsyncRig:
+    # async check/measure flow on top of the controller's per-instrument steps,
+    # independent instruments are driven concurrently, each instrument keeps its command order
+
+    def __init__(self, controller, instruments):
+        self._controller = controller
+        self._instruments = {label: AsyncInstrument(instr, label) for label, instr in instruments.items()}
+
+    def __getitem__(self, label):
+        return self._instruments[label]
+
+    def close(self):
+        for instr in self._instruments.values():
+            instr.close()
+
+    async def prepare(self, param=None):
+        c = self._controller
+        await asyncio.gather(
+            self['Анализатор'].run(self._pnaSetup, param),
+            self['Генератор'].run(self._generatorSetup),
+        )
+
+    def _pnaSetup(self, param):
+        self._controller._pna_init(param)
+        self._harmonicChannelsSetup()
+
+    def _generatorSetup(self):
+        self._controller._generatorReset()
+        self._controller._syncGenerator()
+
+    def _harmonicChannelsSetup(self):
+        self._controller._syncAnalyzer()
+        self._controller._setupHarmonicChannels()
+
+    def _harmonicSpanSetup(self):
+        self._controller._syncGenerator()
+        self._controller._setGeneratorHarmonic(1)
+
+    async def _exclusive(self, fn, *args):
+        # a step alternating between generator and analyzer runs on the analyzer's worker
+        # while the generator's worker is held, nothing else gets in between on either queue
+        done = threading.Event()
+        held = asyncio.ensure_future(self['Генератор'].run(done.wait))
+        try:
+            return await self['Анализатор'].run(fn, *args)
+        finally:
+            done.set()
+            await held
+
+    async def check(self, device, secondary):
+        c = self._controller
+        param = c.deviceParams[device]
+        job = (device, secondary)
+        # the rig the job queue prepared is reused, the same as in the sync flow
+        session = c._takeSession(job)
+        c._planSweep(param)
+        steps = [asyncio.to_thread(c.result.init)]
+        if session is None:
+            steps.append(self.prepare(param))
+        found, *_ = await asyncio.gather(*steps)
+        if not found:
+            return False
+        if session is None:
+            session = RigSession(job, c._instruments, c._syncSteps())
+        return await self._exclusive(c._runCheck, param, c.secondaryParams[secondary], job, session)
+
+    async def measure(self, device, secondary):
+        c = self._controller
+        session = c._takeSession((device, secondary))
+        param = c.deviceParams[device]
+        secondary = c.secondaryParams[secondary]
+        print(f'launch async measure with {param} {secondary}')
+        c._planSweep(param)
+        c.harmonicTraces.clear()
+
+        tracer.phase('pna init')
+        if session is None:
+            await asyncio.gather(
+                self['Генератор'].run(c._generatorReset),
+                self['Анализатор'].run(c._pna_init, param),
+            )
+
+        tracer.phase('static current')
+        if param.hasStatic:
+            # supply before RF and RF off before the supply, only the multimeter display overlaps
+            display = asyncio.ensure_future(self['Мультиметр'].run(c._displayCurrent, param.Istat[secondary]))
+            await self['Источник питания'].run(c._sourceOn, current=420, voltage=5.55)
+            await self['Генератор'].run(c._generatorOn, pow=param.Pmax, freq=param.F)
+            await display
+            await asyncio.sleep(c._settleTime('static current'))
+            await self['Генератор'].run(c._generatorOff)
+            await self['Источник питания'].run(c._sourceOff)
+
+        tracer.phase('rig sync')
+        if session is not None:
+            steps = [
+                self['Анализатор'].run(c._syncAnalyzerDelta, session),
+                self['Генератор'].run(c._syncGeneratorDelta, param, session),
+            ]
+        else:
+            steps = [
+                self['Анализатор'].run(self._harmonicChannelsSetup),
+                self['Генератор'].run(self._harmonicSpanSetup),
+            ]
+        if param.hasStatic:
+            steps.append(self['Источник питания'].run(c._sourceOn, current=300, voltage=4.45))
+        await asyncio.gather(*steps)
+
+        for phase, pow in [('power sweep', param.Pmin), ('frequency sweep', param.Pmax)]:
+            tracer.phase(phase)
+            steps = [self['Генератор'].run(c._generatorOn, pow=pow)]
+            if param.hasDynamic:
+                steps.append(self['Мультиметр'].run(c._displayCurrent, param.Idyn[secondary]))
+            await asyncio.gather(*steps)
+            if phase == 'power sweep':
+                await self['Анализатор'].run(c._set_transfer_format)
+            for mul in c.harmonics:
+                with tracer.span(f'harmonic {mul}'):
+                    await asyncio.gather(
+                        self['Анализатор'].run(c._setAnalyzerHarmonic, mul),
+                        self['Генератор'].run(c._setGeneratorHarmonic, mul),
+                    )
+                    await self['Генератор'].send(':INIT')
+                    await self['Генератор'].query('*OPC?')
+                    await self['Анализатор'].send(f'DISP:WIND1:TRAC{mul}:Y:SCAL:AUTO')
+            await self['Анализатор'].run(c._readHarmonicTraces, phase)
+
+        tracer.phase('teardown')
+        display = asyncio.ensure_future(self['Мультиметр'].send('SYST:PRES'))
+        await self['Генератор'].run(c._generatorOff)
+        await self['Источник питания'].run(c._sourceOff)
+        await display
+        tracer.phase(None)
+
+        return ['ok'], 'ok'
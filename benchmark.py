@@ -0,0 +1,281 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+
+import numpy
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import instrumentcontroller
+import tracedata
+
+from instrumentcontroller import MeasureResultMock
+from paramstore import ParamStore, _compile_file
+
+instrumentcontroller.mock_enabled = True
+
+benchmarks = dict()
+_app = None
+
+
+def benchmark(name, number=100):
+    def register(setup):
+        benchmarks[name] = (setup, number)
+        return setup
+    return register
+
+
+def qt_app():
+    # widgets need a live application object for the whole run
+    global _app
+    from PyQt5.QtWidgets import QApplication
+    _app = QApplication.instance() or QApplication(sys.argv)
+    return _app
+
+
+def make_trace(points=301):
+    freqs = numpy.linspace(0.1e9, 40e9, points)
+    amps = -20 + numpy.random.default_rng(1).normal(0, 3, points)
+    return freqs, amps
+
+
+def make_task_table(path, devices, headers, secondaries=3):
+    import pandas
+    rng = random.Random(1)
+    with pandas.ExcelWriter(path) as writer:
+        for dev in devices:
+            rows = list()
+            for sec in range(secondaries):
+                means = [rng.randint(1, 100) for _ in range(headers)]
+                rows.append([sec, 'span'] + [1.0] * headers)
+                rows.append([sec, 'step'] + [0.1] * headers)
+                rows.append([sec, 'mean'] + means)
+            columns = [dev, 'param'] + [f'h{i}' for i in range(headers)]
+            pandas.DataFrame(rows, columns=columns).to_excel(writer, sheet_name=dev, index=False)
+
+
+def make_result(headers, devices=('dev',)):
+    result = MeasureResultMock({d: None for d in devices}, {0: 0})
+    rng = random.Random(1)
+    for dev in devices:
+        result.headersCache[dev] = [f'h{i}' for i in range(headers)]
+        for sec in range(3):
+            result._generators[f'{dev} {sec}'] = [
+                [1.0, 0.1, rng.randint(1, 100)] if i % 10 else ['-', '-', '-'] for i in range(headers)
+            ]
+            result._compiled[f'{dev} {sec}'] = result.compile_generators(result._generators[f'{dev} {sec}'])
+    return result
+
+
+@benchmark('trace.parse_ascii_list', number=500)
+def bench_parse_ascii_list():
+    text = ','.join(f'{v:+.12e}' for v in make_trace()[1])
+    return lambda: [float(x) for x in text.split(',')]
+
+
+@benchmark('trace.parse_ascii', number=500)
+def bench_parse_ascii():
+    text = ','.join(f'{v:+.12e}' for v in make_trace()[1])
+    return lambda: tracedata.parse_ascii(text)
+
+
+@benchmark('trace.parse_block', number=5000)
+def bench_parse_block():
+    raw = tracedata.make_block(make_trace()[1]) + b'\n'
+    return lambda: tracedata.parse_block(raw)
+
+
+@benchmark('trace.nearest_list', number=500)
+def bench_nearest_list():
+    freqs = make_trace()[0].tolist()
+    target = 12.345e9
+
+    def run():
+        diffs = [abs(f - target) for f in freqs]
+        return diffs.index(min(diffs))
+    return run
+
+
+@benchmark('trace.nearest_index', number=5000)
+def bench_nearest_index():
+    freqs = make_trace()[0]
+    return lambda: tracedata.nearest_index(freqs, 12.345e9)
+
+
+@benchmark('tasktable.parse', number=1)
+def bench_task_table_parse(workdir):
+    devices = [f'dev{i}' for i in range(8)]
+    path = os.path.join(workdir, 'task.xlsx')
+    make_task_table(path, devices, headers=60)
+    result = MeasureResultMock({d: None for d in devices}, {0: 0})
+    return lambda: result._parese_task_table(path)
+
+
+@benchmark('tasktable.cached_init', number=50)
+def bench_task_table_cached_init(workdir):
+    devices = [f'dev{i}' for i in range(8)]
+    tabledir = os.path.join(workdir, 'cached')
+    os.makedirs(tabledir)
+    make_task_table(os.path.join(tabledir, 'task.xlsx'), devices, headers=60)
+    result = MeasureResultMock({d: None for d in devices}, {0: 0})
+
+    def run():
+        cwd = os.getcwd()
+        os.chdir(tabledir)
+        try:
+            return result.init()
+        finally:
+            os.chdir(cwd)
+    return run
+
+
+@benchmark('result.generate_value', number=20)
+def bench_generate_value():
+    triples = make_result(1000)._generators['dev 0']
+    return lambda: [MeasureResultMock.generate_value(t) for t in triples]
+
+
+@benchmark('result.process_raw_data', number=20)
+def bench_process_raw_data():
+    result = make_result(1000)
+    return lambda: result.process_raw_data('dev', 1, None)
+
+
+@benchmark('result.generate_rows', number=20)
+def bench_generate_rows():
+    result = make_result(1000)
+    return lambda: result.generate_rows('dev', 1, rows=1000)
+
+
+@benchmark('params.parse', number=50)
+def bench_params_parse():
+    return lambda: _compile_file('params.ini')
+
+
+@benchmark('params.load', number=50)
+def bench_params_load():
+    return lambda: ParamStore('params.ini')
+
+
+@benchmark('params.lookup', number=10000)
+def bench_params_lookup():
+    params = ParamStore('params.ini')
+    name = params.keys()[-1]
+
+    def run():
+        param = params[name]
+        return param.hasStatic and param.Istat[1]
+    return run
+
+
+@benchmark('startup.import', number=1)
+def bench_startup_import():
+    # fresh interpreter, what the operator waits for before the window shows up
+    command = [sys.executable, '-c', 'import mainwindow']
+    return lambda: subprocess.run(command, check=True)
+
+
+@benchmark('startup.ui_runtime', number=20)
+def bench_startup_ui_runtime():
+    from PyQt5 import uic
+    from PyQt5.QtWidgets import QWidget
+    qt_app()
+    return lambda: uic.loadUi('measurewidget.ui', QWidget())
+
+
+@benchmark('startup.ui_compiled', number=20)
+def bench_startup_ui_compiled():
+    from PyQt5.QtWidgets import QWidget
+    from uiloader import load_ui
+    qt_app()
+    return lambda: load_ui('measurewidget.ui', QWidget())
+
+
+@benchmark('startup.window', number=5)
+def bench_startup_window():
+    from mainwindow import MainWindow
+    qt_app()
+
+    def build():
+        window = MainWindow()
+        # every window starts a params.ini watcher, left running it would pile up threads over the repeats
+        window._instrumentController.deviceParams.stop()
+        window.close()
+    return build
+
+
+def run(names, workdir):
+    results = dict()
+    for name in names:
+        setup, number = benchmarks[name]
+        args = (workdir,) if setup.__code__.co_argcount else ()
+        fn = setup(*args)
+        # keep the controller's progress prints out of the report
+        stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+        try:
+            best = min(timeit.Timer(fn).repeat(repeat=5, number=number)) / number
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        results[name] = best
+        print(f'{name:<28} {best * 1e6:12.1f} us')
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = list()
+    for name, value in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        ratio = value / base
+        flag = 'REGRESSION' if ratio > 1 + threshold else ''
+        print(f'{name:<28} {ratio:8.2f}x  {flag}')
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description='controller data path micro-benchmarks')
+    parser.add_argument('names', nargs='*', help='benchmarks to run, all by default')
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--baseline', default='bench_baseline.json')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown, 0.2 = 20%%')
+    opts = parser.parse_args(args)
+
+    names = [n for n in benchmarks if not opts.names or any(n.startswith(p) for p in opts.names)]
+    workdir = tempfile.mkdtemp(prefix='bench')
+    try:
+        results = run(names, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(opts.output, 'wt') as f:
+        json.dump(results, f, indent=2)
+
+    if opts.save_baseline:
+        with open(opts.baseline, 'wt') as f:
+            json.dump(results, f, indent=2)
+        print(f'baseline saved to {opts.baseline}')
+        return 0
+
+    if not os.path.isfile(opts.baseline):
+        print(f'no baseline at {opts.baseline}, run with --save-baseline')
+        return 0
+
+    with open(opts.baseline, 'rt') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, opts.threshold)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
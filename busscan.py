@@ -0,0 +1,103 @@
+import ast
+import os
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from visasession import sessions
+
+
+def idn_model(idn):
+    parts = idn.split(',')
+    return parts[1].strip() if len(parts) > 1 else ''
+
+
+class BusScanner:
+    # every GPIB and LAN instrument is asked *IDN? at once with a short timeout,
+    # one scan per connect is shared by all factories that missed their address.
+    # serial ports are left alone, whatever hangs on them is not ours to write to
+
+    def __init__(self, timeout=500, queries=('GPIB?*::INSTR', 'TCPIP?*::INSTR')):
+        self.timeout = timeout
+        self.queries = queries
+        self._lock = threading.Lock()
+        self._found = None
+        self._claimed = set()
+
+    def clear(self):
+        with self._lock:
+            self._found = None
+            self._claimed = set()
+
+    def find(self, applicable):
+        with self._lock:
+            if self._found is None:
+                self._found = self._scan()
+            for addr, idn in self._found.items():
+                if addr not in self._claimed and idn_model(idn) in applicable:
+                    # two instruments of the same model go to two factories
+                    self._claimed.add(addr)
+                    return addr, idn
+        return None, None
+
+    def _scan(self):
+        addrs = list()
+        for query in self.queries:
+            try:
+                # a query that matches nothing raises on some VISA libraries
+                addrs += [a for a in sessions.resource_manager.list_resources(query) if a not in addrs]
+            except Exception as ex:
+                print(f'bus scan {query}:', ex)
+        if not addrs:
+            print('bus scan: no resources')
+            return dict()
+        with ThreadPoolExecutor(max_workers=len(addrs), thread_name_prefix='bus-scan') as pool:
+            idns = list(pool.map(self._identify, addrs))
+        found = {addr: idn for addr, idn in zip(addrs, idns) if idn}
+        print(f'bus scan: {len(found)} of {len(addrs)} resources answered')
+        for addr, idn in found.items():
+            print(f'  {addr}: {idn}')
+        return found
+
+    def _identify(self, addr):
+        # own short-lived session, the shared ones keep their timeouts
+        try:
+            inst = sessions.resource_manager.open_resource(addr, open_timeout=self.timeout)
+        except Exception:
+            return None
+        try:
+            inst.timeout = self.timeout
+            return inst.query('*IDN?').strip()
+        except Exception:
+            return None
+        finally:
+            inst.close()
+
+
+bus = BusScanner()
+
+
+def load_addresses(filename):
+    # {instrument label: VISA address} of the last successful connect
+    if not filename or not os.path.isfile(filename):
+        return dict()
+    try:
+        with open(filename, 'rt', encoding='utf-8') as f:
+            addrs = ast.literal_eval(f.read())
+    except (OSError, SyntaxError, ValueError) as ex:
+        print(f'{filename}: not loaded:', ex)
+        return dict()
+    if not isinstance(addrs, dict):
+        print(f'{filename}: expected a dict of addresses')
+        return dict()
+    return {k: v for k, v in addrs.items() if isinstance(k, str) and isinstance(v, str)}
+
+
+def save_addresses(filename, addrs):
+    lines = ['{'] + [f'    {k!r}: {v!r},' for k, v in addrs.items()] + ['}', '']
+    try:
+        with open(filename + '.tmp', 'wt', encoding='utf-8') as f:
+            f.write('\n'.join(lines))
+        os.replace(filename + '.tmp', filename)
+    except OSError as ex:
+        print(f'{filename}: not saved:', ex)
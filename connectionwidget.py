@@ -1,8 +1,8 @@
-from PyQt5 import uic
 from PyQt5.QtCore import pyqtSlot, pyqtSignal, QRunnable, QThreadPool
 from PyQt5.QtWidgets import QWidget
 
 from instrumentwidget import InstrumentWidget
+from uiloader import load_ui
 
 
 class ConnectTask(QRunnable):
@@ -26,7 +26,7 @@ class ConnectionWidget(QWidget):
     def __init__(self, parent=None, controller=None):
         super().__init__(parent=parent)
 
-        self._ui = uic.loadUi('connectionwidget.ui', self)
+        self._ui = load_ui('connectionwidget.ui', self)
         self._controller = controller
         self._threads = QThreadPool()
 
@@ -56,4 +56,7 @@ class ConnectionWidget(QWidget):
 
         for w, s in zip(self._widgets.values(), self._controller.status):
             w.status = s
+        # a bus scan may have found instruments away from the entered addresses
+        for k, w in self._widgets.items():
+            w.address = self._controller.requiredInstruments[k].addr
         self.connected.emit()
@@ -26,6 +26,18 @@ class DeviceSelectWidget(QWidget):
 
         self._enabled = True
 
+    @pyqtSlot(list)
+    def setDevices(self, names):
+        # keep the current choice when it survives a params reload
+        selected = self.selected
+        self._combo.blockSignals(True)
+        self._combo.clear()
+        self._combo.addItems(names)
+        self._combo.setCurrentIndex(max(self._combo.findText(selected), 0))
+        self._combo.blockSignals(False)
+        if self.selected != selected:
+            self.selectedChanged.emit(self.selected)
+
     @property
     def selected(self):
         return self._combo.currentText()
@@ -1,11 +1,14 @@
+import asyncio
 import random
 import time
-import pandas
-import visa
+import numpy
+import tracedata
 
 from os import listdir
 from os.path import isfile, join
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, ExitStack
 
 from PyQt5.QtCore import QObject
 
@@ -22,22 +25,44 @@ from agilente3644amock import AgilentE3644AMock
 from agilentn5183amock import AgilentN5183AMock
 from agilentn5230amock import AgilentN5230AMock
 from agilentn9030amock import AgilentN9030AMock
-from instr.agilent34410a import Agilent34410A
-from instr.agilentN5230A import AgilentN5230A
-from instr.agilente3644a import AgilentE3644A
-from instr.agilentn5183a import AgilentN5183A
-from instr.agilentn9030a import AgilentN9030A
+from asyncdriver import AsyncRig
+from busscan import bus, idn_model, load_addresses, save_addresses
+from jobqueue import MeasureJobQueue
+from measregistry import MeasurementRegistry
+from opcwait import OperationWaiter
+from paramstore import ParamStore
+from pnastate import PnaStateCache
+from resultsink import ResultSink
+from rigsession import RigSession
+from scpibatch import BatchedInstrument
+from shadowcache import ShadowedInstrument
+from simtransport import SimulatedTransport
+from sweepplan import SweepPlanner
+from tablecache import CompiledFileCache
+from tracing import tracer, traced
+from visasession import sessions
 
 mock_enabled = False
+# mock bus timing, see simtransport.profiles: None - instant constant answers, 'gpib', 'lan'
+mock_profile = None
+# an instrument missing at its address is looked for on the whole bus, off where the bus is shared by other rigs
+bus_scan = True
 giga = 1_000_000_000
 mega = 1_000_000
 
+task_tables = CompiledFileCache(prefix='tasktable')
+
+
+def simulated(mock):
+    return SimulatedTransport(mock, mock_profile) if mock_profile else mock
+
 
 class InstrumentFactory:
     def __init__(self, addr, label):
         self.applicable = None
         self.addr = addr
         self.label = label
+        self.transport = None
     def find(self):
         # TODO remove applicable instrument when found one if needed more than one instrument of the same type
         # TODO: idea: pass list of applicable instruments to differ from the model of the same type?
@@ -48,7 +73,35 @@ class InstrumentFactory:
     def from_address(self):
         raise NotImplementedError()
     def try_find(self):
-        raise NotImplementedError()
+        if mock_enabled:
+            return None
+        if not bus_scan:
+            print(f'{self.label}: no {", ".join(self.applicable)} at {self.addr}, bus scan is off')
+            return None
+        addr, idn = bus.find(self.applicable)
+        if addr is None:
+            print(f'{self.label}: no {", ".join(self.applicable)} found on the bus')
+            return None
+        print(f'{self.label}: {idn_model(idn)} found at {addr}, was {self.addr}')
+        self.addr = addr
+        return self.from_address()
+    def identify(self):
+        # *IDN? at the configured address, None when nothing applicable answers there
+        for attempt in range(2):
+            try:
+                self.transport = traced(sessions.open(self.addr), self.label)
+                idn = self.transport.query('*IDN?')
+                break
+            except Exception as ex:
+                # the cached session does not survive an instrument or station reboot, retry with a fresh one
+                sessions.close(self.addr)
+                if attempt:
+                    print(f'{self.label}: no answer at {self.addr}:', ex)
+                    return None
+        if idn_model(idn) not in self.applicable:
+            print(f'{self.label}: {self.addr} is {idn.strip()}, expected {", ".join(self.applicable)}')
+            return None
+        return idn
 
 
 class GeneratorFactory(InstrumentFactory):
@@ -56,18 +109,13 @@ class GeneratorFactory(InstrumentFactory):
         super().__init__(addr=addr, label='Генератор')
         self.applicable = ['N5183A', 'N5181B']
     def from_address(self):
+        from instr.agilentn5183a import AgilentN5183A
         if mock_enabled:
-            return AgilentN5183A(self.addr, '1,N5183A mock,1', AgilentN5183AMock())
-        try:
-            rm = visa.ResourceManager()
-            inst = rm.open_resource(self.addr)
-            idn = inst.query('*IDN?')
-            name = idn.split(',')[1].strip()
-            if name in self.applicable:
-                return AgilentN5183A(self.addr, idn, inst)
-        except Exception as ex:
-            print('Generator find error:', ex)
-            exit(1)
+            self.transport = traced(simulated(AgilentN5183AMock()), self.label)
+            return AgilentN5183A(self.addr, '1,N5183A mock,1', self.transport)
+        idn = self.identify()
+        if idn:
+            return AgilentN5183A(self.addr, idn, self.transport)
 
 
 class SpectrumAnalyzerFactory(InstrumentFactory):
@@ -75,18 +123,13 @@ class SpectrumAnalyzerFactory(InstrumentFactory):
         super().__init__(addr=addr, label='Анализатор')
         self.applicable = ['N9030A']
     def from_address(self):
+        from instr.agilentn9030a import AgilentN9030A
         if mock_enabled:
-            return AgilentN9030A(self.addr, '1,N9030A mock,1', AgilentN9030AMock())
-        try:
-            rm = visa.ResourceManager()
-            inst = rm.open_resource(self.addr)
-            idn = inst.query('*IDN?')
-            name = idn.split(',')[1].strip()
-            if name in self.applicable:
-                return AgilentN9030A(self.addr, idn, inst)
-        except Exception as ex:
-            print('Analyzer find error:', ex)
-            exit(2)
+            self.transport = traced(simulated(AgilentN9030AMock()), self.label)
+            return AgilentN9030A(self.addr, '1,N9030A mock,1', self.transport)
+        idn = self.identify()
+        if idn:
+            return AgilentN9030A(self.addr, idn, self.transport)
 
 
 class NetworkAnalyzerFactory(InstrumentFactory):
@@ -94,18 +137,13 @@ class NetworkAnalyzerFactory(InstrumentFactory):
         super().__init__(addr=addr, label='Анализатор')
         self.applicable = ['N5230A']
     def from_address(self):
+        from instr.agilentN5230A import AgilentN5230A
         if mock_enabled:
-            return AgilentN5230A(self.addr, '1,N5230A mock,1', AgilentN5230AMock())
-        try:
-            rm = visa.ResourceManager()
-            inst = rm.open_resource(self.addr)
-            idn = inst.query('*IDN?')
-            name = idn.split(',')[1].strip()
-            if name in self.applicable:
-                return AgilentN9030A(self.addr, idn, inst)
-        except Exception as ex:
-            print('Analyzer find error:', ex)
-            exit(2)
+            self.transport = traced(simulated(AgilentN5230AMock()), self.label)
+            return AgilentN5230A(self.addr, '1,N5230A mock,1', self.transport)
+        idn = self.identify()
+        if idn:
+            return AgilentN5230A(self.addr, idn, self.transport)
 
 
 class MultimeterFactory(InstrumentFactory):
@@ -113,41 +151,33 @@ class MultimeterFactory(InstrumentFactory):
         super().__init__(addr=addr, label='Мультиметр')
         self.applicable = ['34410A']
     def from_address(self):
+        from instr.agilent34410a import Agilent34410A
         if mock_enabled:
-            return Agilent34410A(self.addr, '1,34410A mock,1', Agilent34410AMock())
-        try:
-            rm = visa.ResourceManager()
-            inst = rm.open_resource(self.addr)
-            idn = inst.query('*IDN?')
-            name = idn.split(',')[1].strip()
-            if name in self.applicable:
-                return Agilent34410A(self.addr, idn, inst)
-        except Exception as ex:
-            print('Multimeter find error:', ex)
-            exit(3)
+            self.transport = traced(simulated(Agilent34410AMock()), self.label)
+            return Agilent34410A(self.addr, '1,34410A mock,1', self.transport)
+        idn = self.identify()
+        if idn:
+            return Agilent34410A(self.addr, idn, self.transport)
 
 
 class SourceFactory(InstrumentFactory):
     def __init__(self, addr):
-        super().__init__(addr=addr, label='Исчточник питания')
+        super().__init__(addr=addr, label='Источник питания')
         self.applicable = ['E3648A']
     def from_address(self):
+        from instr.agilente3644a import AgilentE3644A
         if mock_enabled:
-            return AgilentE3644A(self.addr, '1,E3648A mock,1', AgilentE3644AMock())
-        try:
-            rm = visa.ResourceManager()
-            inst = rm.open_resource(self.addr)
-            idn = inst.query('*IDN?')
-            name = idn.split(',')[1].strip()
-            if name in self.applicable:
-                return AgilentE3644A(self.addr, idn, inst)
-        except Exception as ex:
-            print('Source find error:', ex)
-            exit(4)
+            self.transport = traced(simulated(AgilentE3644AMock()), self.label)
+            return AgilentE3644A(self.addr, '1,E3648A mock,1', self.transport)
+        idn = self.identify()
+        if idn:
+            return AgilentE3644A(self.addr, idn, self.transport)
 
 
 class MeasureResult:
     def __init__(self):
+        self.device = None
+        self.secondary = None
         self.headers = list()
     def init(self):
         raise NotImplementedError()
@@ -156,18 +186,25 @@ class MeasureResult:
 
 
 class MeasureResultMock(MeasureResult):
-    def __init__(self, device, secondary):
+    # compiled task table layout, bump when _parese_task_table output changes
+    table_version = 2
+
+    def __init__(self, device, secondary, seed=None):
         super().__init__()
         self.devices: list = list(device.keys())
-        self.secondary: dict = secondary
+        self.secondaryParams: dict = secondary
 
         self.headersCache = dict()
         self._generators = defaultdict(list)
+        self._compiled = dict()
+        self._failedSheets = list()
+        self._rng = numpy.random.default_rng(seed)
         self.data = list()
 
+    def seed(self, value):
+        self._rng = numpy.random.default_rng(value)
+
     def init(self):
-        self.headersCache.clear()
-        self._generators.clear()
         self.data.clear()
 
         # check task table presence
@@ -179,28 +216,89 @@ class MeasureResultMock(MeasureResult):
             print('working dir should have only one task table')
             return False
 
-        self._parese_task_table(files[0])
+        print(f'using task table: {files[0]}')
+        headers, generators, compiled = task_tables.load(files[0], self._parese_task_table,
+                                                          key=(self.table_version, tuple(self.devices)),
+                                                          complete=lambda table: not self._failedSheets)
+        self.headersCache = headers
+        self._generators = defaultdict(list, generators)
+        self._compiled = compiled
+        if self._failedSheets:
+            failed = 'all device types' if len(self._failedSheets) == len(self.devices) else ', '.join(self._failedSheets)
+            print(f'task table {files[0]}: not loaded for {failed}')
         return True
 
     def _parese_task_table(self, filename):
-        print(f'using task table: {filename}')
+        import pandas
+        print(f'parsing task table: {filename}')
+        headers_cache = dict()
+        generators = defaultdict(list)
+        self._failedSheets = list()
+        try:
+            book = pandas.ExcelFile(filename)
+        except Exception as ex:
+            # a corrupt or half-saved file: nothing is loaded and nothing is cached
+            print('Error:', ex)
+            self._failedSheets = list(self.devices)
+            return headers_cache, dict(generators), dict()
         for dev in self.devices:
+            # a device type without a sheet is part of the table, a sheet that fails to parse is not
+            if dev not in book.sheet_names:
+                print(f'no task table sheet for {dev}')
+                continue
             try:
-                raw_data: pandas.DataFrame = pandas.read_excel(filename, sheet_name=dev)
+                raw_data: pandas.DataFrame = pandas.read_excel(book, sheet_name=dev)
             except Exception as ex:
                 print('Error:', ex)
+                self._failedSheets.append(dev)
                 continue
             name, _, *headers = raw_data.columns.tolist()
-            self.headersCache[name] = headers
+            headers_cache[name] = headers
             for g in raw_data.groupby(name):
                 _, df = g
                 for h in headers:
-                    self._generators[f'{name} {df[name].tolist()[0]}'].append(df[h].tolist())
+                    generators[f'{name} {df[name].tolist()[0]}'].append(df[h].tolist())
+        return headers_cache, dict(generators), {k: self.compile_generators(v) for k, v in generators.items()}
+
+    @staticmethod
+    def compile_generators(triples):
+        # (span, step, mean) rows as arrays: start, step, number of steps and validity mask
+        size = len(triples)
+        start = numpy.zeros(size)
+        step = numpy.zeros(size)
+        counts = numpy.zeros(size, dtype=numpy.int64)
+        valid = numpy.zeros(size, dtype=bool)
+        for i, data in enumerate(triples):
+            if not data or len(data) != 3 or '-' in data or chr(0x2212) in data or not all(data):
+                continue
+            try:
+                span, st, mean = (float(v) for v in data)
+            except (TypeError, ValueError):
+                continue
+            if not numpy.isfinite([span, st, mean]).all():
+                continue
+            start[i] = mean - span
+            step[i] = st
+            counts[i] = int((mean + span - start[i]) / st)
+            valid[i] = True
+        return start, step, counts, valid
+
+    def generate_rows(self, device, secondary, rows=1):
+        compiled = self._compiled.get(f'{device} {secondary}')
+        if compiled is None:
+            return numpy.empty((rows, 0))
+        start, step, counts, valid = compiled
+        values = self._rng.integers(0, counts + 1, size=(rows, len(counts))) * step + start
+        values[:, ~valid] = numpy.nan
+        return values
 
     def process_raw_data(self, device, secondary, raw_data):
         print('processing', device, secondary, raw_data)
+        self.device = device
+        self.secondary = secondary
         self.headers = self.headersCache[device]
-        self.data = [self.generate_value(data) for data in self._generators[f'{device} {secondary}']]
+        values = self.generate_rows(device, secondary)[0]
+        self.data = [v if v == v else '-' for v in values.tolist()]
 
     @staticmethod
     def generate_value(data):
@@ -215,7 +313,7 @@ class MeasureResultMock(MeasureResult):
 
 class InstrumentController(QObject):
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, addrs=None):
         super().__init__(parent=parent)
 
         self.requiredInstruments = {
@@ -224,8 +322,13 @@ class InstrumentController(QObject):
             'Генератор': GeneratorFactory('GPIB1::20::INSTR'),
             'Анализатор': NetworkAnalyzerFactory('GPIB1::10::INSTR'),
         }
+        # addresses of the last successful connect, found by a bus scan if the instruments were moved
+        self.addressFile = './addresses.ini'
+        for k, v in {**load_addresses(self.addressFile), **(addrs or dict())}.items():
+            if k in self.requiredInstruments:
+                self.requiredInstruments[k].addr = v
 
-        self.deviceParams = {
+        default_params = {
             'Тип 3': {
                 'F': 6.0,
                 'Pmin': 15,
@@ -243,11 +346,10 @@ class InstrumentController(QObject):
             },
         }
 
-        if isfile('./params.ini'):
-            import ast
-            with open('./params.ini', 'rt', encoding='utf-8') as f:
-                raw = ''.join(f.readlines())
-                self.deviceParams = ast.literal_eval(raw)
+        # device types are validated on load, edits to params.ini are picked up without a restart
+        self.deviceParams = ParamStore('./params.ini', defaults=default_params)
+        self.deviceParams.subscribe(self._paramsReloaded)
+        self.deviceParams.watch()
 
         # TODO generate combo for secondary params
         self.secondaryParams = {
@@ -258,57 +360,225 @@ class InstrumentController(QObject):
 
         self.span = 1
 
+        # the most points a sweep gets, the planner picks fewer for narrow device bands
+        self.sweepPoints = 301
+        self.sweepPlanner = SweepPlanner(self.harm_offset, self.harmonics, max_points=self.sweepPoints)
+        self.sweep = None
+
+        # trace transfer format: FORM:DATA REAL,64 blocks or FORM:DATA ASCII
+        self.binaryTransfer = True
+
+        # harmonic traces of the last measure per power level, read back only for the trace archive
+        self.harmonicTraces = dict()
+
+        # operation completion: 'opc' - *OPC? query, 'stb' - status byte polling, 'srq' - service request
+        self._waiter = OperationWaiter(mode='opc')
+
+        # every measurement is streamed to an on-disk log, None - keep only the last one
+        self.resultSink = ResultSink('results')
+
+        # raw traces of every check and harmonic sweep in memory-mapped records (runner --archive),
+        # off by default: loop mode reads the harmonic traces back only for it
+        self.traceArchive = None
+        self.checkTraces = dict()
+
+        # analyzer setup saved per device type and recalled with MMEM:LOAD, None - preset every time
+        self.pnaStates = PnaStateCache(index=None if mock_enabled else '.cache/pnastates.json')
+        # measurements defined on the analyzer, kept across cycles
+        self.measurements = MeasurementRegistry()
+
+        # directory for Chrome trace-event dumps of every check/measure with tracer.enabled, None - summary only
+        self.traceDir = None
+        self.waitTimeouts = {
+            'check rig setup': 5.0,
+            'check sweep': 5.0,
+        }
+        # DUT settling before a reading, no instrument operation to wait for, skipped with mocks
+        self.settleTimes = {
+            'static current': 3.0,
+        }
+
         self._instruments = {}
+        self._rig = None
+        # configured rig handed from prepare to check and from check to measure of the same job
+        self._session = None
+
+        # drive independent instruments concurrently through AsyncRig
+        self.asyncFlow = False
         self.found = False
         self.present = False
         self.hasResult = False
+        # measure phase totals of the last measure, what the result log stores as phases
+        self.phases = dict()
 
         # self.result = MeasureResult() if not mock_enabled \
         #     else MeasureResultMock(self.deviceParams, self.secondaryParams)
         self.result = MeasureResultMock(self.deviceParams, self.secondaryParams)
 
+    def _paramsReloaded(self, params):
+        self.result.devices = list(params)
+
     def __str__(self):
         return f'{self._instruments}'
 
     def connect(self, addrs):
         print(f'searching for {addrs}')
+        if self._instruments:
+            self.disconnect()
         for k, v in addrs.items():
             self.requiredInstruments[k].addr = v
         self.found = self._find()
 
+    def disconnect(self):
+        if self._rig is not None:
+            self._rig.close()
+            self._rig = None
+        self._instruments = {}
+        self._session = None
+        self.found = False
+        self._invalidatePnaState()
+        sessions.close_all()
+
     def _find(self):
-        self._instruments = {
-            k: v.find() for k, v in self.requiredInstruments.items()
-        }
-        return all(self._instruments.values())
+        # *IDN? handshakes run concurrently, connect time is set by the slowest instrument
+        bus.clear()
+        with ThreadPoolExecutor(max_workers=len(self.requiredInstruments)) as pool:
+            futures = {k: pool.submit(v.find) for k, v in self.requiredInstruments.items()}
+            self._instruments = {k: f.result() for k, f in futures.items()}
+        if not all(self._instruments.values()):
+            return False
+        if self.addressFile and not mock_enabled:
+            save_addresses(self.addressFile, {k: v.addr for k, v in self.requiredInstruments.items()})
+        self._instruments = {k: ShadowedInstrument(BatchedInstrument(v)) for k, v in self._instruments.items()}
+        self._invalidatePnaState()
+        if self._rig is not None:
+            self._rig.close()
+        self._rig = AsyncRig(self, self._instruments)
+        return True
+
+    @contextmanager
+    def _batched(self, *labels):
+        instruments = [self._instruments[label] for label in labels]
+        with ExitStack() as stack:
+            for instr in instruments:
+                instr.reset_stats()
+                stack.enter_context(instr.batch())
+            yield
+        for label, instr in zip(labels, instruments):
+            print(f'{label}: {instr.queued} commands in {instr.transactions} transactions, saved {instr.saved} round trips')
+
+    def prepare(self, params):
+        print(f'call prepare with {params}')
+        device, secondary = params
+        self._planSweep(self.deviceParams[device])
+        self._generatorReset()
+        self._pna_init(self.deviceParams[device])
+        self._syncRig()
+        self._keepSession(params, *self._syncSteps())
+
+    def _planSweep(self, param):
+        sweep = self.sweepPlanner.plan(param)
+        if repr(sweep) != repr(self.sweep):
+            print(sweep)
+        self.sweep = sweep
+
+    def _syncSteps(self):
+        return 'pna', 'generator reset', 'analyzer', 'generator', 'channels'
+
+    def _keepSession(self, job, *steps):
+        self._session = RigSession(job, self._instruments, steps)
+
+    def _takeSession(self, job):
+        # a session is consumed by the next step, whatever it finds
+        session, self._session = self._session, None
+        if session is None:
+            return None
+        if tuple(job) != session.job:
+            print(f'{session} is for another job, full setup')
+            return None
+        touched = session.touched(self._instruments)
+        if touched:
+            print(f'{session} dropped, used since: {", ".join(touched)}')
+            return None
+        print(f'warm start from {session}')
+        return session
+
+    def runJobs(self, jobs, swap=None, report=None):
+        return MeasureJobQueue(self, swap=swap, report=report).run(jobs)
 
     def check(self, params):
         print(f'call check with {params}')
         device, secondary = params
-        self.present = self._check(device, secondary)
+        self._waiter.clear()
+        tracer.clear()
+        with tracer.span('check', lane='cycle', device=device, secondary=secondary):
+            self.present = self._check(device, secondary)
+        tracer.phase(None)
+        self._waiter.report()
+        self._trace_report('check')
         print('sample pass')
 
     def _check(self, device, secondary):
         print(f'launch check with {self.deviceParams[device]} {self.secondaryParams[secondary]}')
         # TODO implement pna-check
-        return self.result.init() and self._runCheck(self.deviceParams[device], self.secondaryParams[secondary])
-
-    def _runCheck(self, param, secondary):
-        Ptest = param['Ptest']
-        harm = param['harm']
-        Ftest = param['Ftest'] * harm * giga
+        param = self.deviceParams[device]
+        if not param.checkable:
+            print(f'{device}: no Ftest/Ptest/harm in params.ini, sample check is not possible')
+            return False
+        if self.asyncFlow:
+            return asyncio.run(self._rig.check(device, secondary))
+        job = (device, secondary)
+        return self.result.init() and self._runCheck(param, self.secondaryParams[secondary],
+                                                     job, self._takeSession(job))
+
+    def _runCheck(self, param, secondary, job=None, session=None):
+        Ptest = param.Ptest
+        Ftest = param.checkFreq
+
+        tracer.phase('rig setup')
+        self._planSweep(param)
+        if session is None:
+            self._generatorReset()
+            self._pna_init(param)
+            self._syncRig()
+        steps = session.steps if session is not None else self._syncSteps()
+        # the test harmonic's own measurement and channel
+        self._set_harmonic(param.harm)
+
+        self._wait('Анализатор', 'check rig setup')
+
+        self._set_transfer_format()
+
+        freqs, amps = self._checkSweep(param)
+        idx = tracedata.nearest_index(freqs, Ftest)
+        if self.sweep.refine(amps[idx], Ptest):
+            print(f'Pread={amps[idx]} is close to Ptest={Ptest}, refining around Ftest')
+            # the channel's own IF bandwidth comes back after the refine, the span is restored by the rig sync
+            ifbw = float(self._instruments['Анализатор'].query(f'SENS{param.harm}:BWID?'))
+            self._setAnalyzerRange(*self.sweep.check, param.harm, min(self.sweep.fine_ifbw, ifbw))
+            self._setGeneratorSpan(*self.sweep.check)
+            freqs, amps = self._checkSweep(param, 'check refine')
+            idx = tracedata.nearest_index(freqs, Ftest)
+            self._instruments['Анализатор'].send(f'SENS{param.harm}:BWID {ifbw:g}')
+
+        tracer.phase(None)
+        print(f'Ftest={Ftest}, Ptest={Ptest} => Fread={freqs[idx]}, Pread={amps[idx]}')
 
-        self._pna_init()
-        self._syncRig()
-        self._set_harmonic(2)
+        present = bool(amps[idx] > Ptest)
+        if job is not None and self.traceArchive is not None:
+            self.checkTraces[job] = (freqs, amps)
+        if present and job is not None:
+            self._keepSession(job, 'check', *steps)
+        return present
 
-        if not mock_enabled:
-            time.sleep(0.3)
+    def _checkSweep(self, param, phase='check sweep'):
+        tracer.phase(phase)
+        ch = param.harm
 
-        self._instruments['Анализатор'].send('FORM:DATA ASCII')
-        self._instruments['Анализатор'].send(f'CALC1:PAR:SEL "MEAS_1"')
+        # a single sweep is a pending operation until its last point, *OPC? in continuous mode returns at once
+        self._instruments['Анализатор'].send(f'SENS{ch}:SWE:MODE SING')
 
-        self._instruments['Генератор'].set_pow(value=param['Pmin'], unit='dBm')
+        self._instruments['Генератор'].set_pow(value=param.Pmin, unit='dBm')
         self._instruments['Генератор'].set_output(state='ON')
         self._instruments['Генератор'].send(f':INIT')
         self._instruments['Генератор'].query('*OPC?')
@@ -317,195 +587,370 @@ class InstrumentController(QObject):
 
         self._instruments['Генератор'].set_output(state='OFF')
 
-        if not mock_enabled:
-            time.sleep(0.3)
-
-        freqs = [float(x) for x in self._instruments['Анализатор'].query(f'SENS1:X?').split(',')]
-        amps = [float(x) for x in self._instruments['Анализатор'].query(f'CALC1:DATA? FDATA').split(',')]
-
-        diffs = [abs(f - Ftest) for f in freqs]
-        idx = diffs.index(min(diffs))
-
-        print(f'Ftest={Ftest}, Ptest={Ptest} => Fread={freqs[idx]}, Pread={amps[idx]}')
-
-        return amps[idx] > Ptest
+        self._wait('Анализатор', 'check sweep')
+        # the harmonic sweeps are triggered point by point in continuous mode
+        self._instruments['Анализатор'].send(f'SENS{ch}:SWE:MODE CONT')
+
+        tracer.phase('trace read')
+        freqs = self._query_trace(f'SENS{ch}:X?')
+        amps = self._query_trace(f'CALC{ch}:DATA? FDATA')
+        return freqs, amps
+
+    def _trace_report(self, kind):
+        if not tracer.enabled:
+            return
+        print(tracer.summary())
+        if self.traceDir:
+            path = join(self.traceDir, f'{kind}-{time.strftime("%Y%m%d-%H%M%S")}.json')
+            tracer.export_chrome(path)
+            print(f'trace saved to {path}')
+
+    def _wait(self, label, step):
+        self._waiter.wait(self._instruments[label], step,
+                          timeout=self.waitTimeouts[step],
+                          transport=self.requiredInstruments[label].transport)
+
+    def _settleTime(self, step):
+        return 0.0 if mock_enabled else self.settleTimes[step]
+
+    def _settle(self, step):
+        time.sleep(self._settleTime(step))
+
+    def _set_transfer_format(self):
+        if self.binaryTransfer:
+            self._instruments['Анализатор'].send('FORM:DATA REAL,64')
+            self._instruments['Анализатор'].send('FORM:BORD NORM')
+        else:
+            self._instruments['Анализатор'].send('FORM:DATA ASCII')
+
+    def _query_trace(self, question):
+        if not self.binaryTransfer:
+            return tracedata.parse_ascii(self._instruments['Анализатор'].query(question))
+        transport = self.requiredInstruments['Анализатор'].transport
+        transport.write(question)
+        return tracedata.read_block(transport)
 
     def measure(self, params):
         print(f'call measure with {params}')
         device, secondary = params
-        raw_data = self._measure(device, secondary)
+        self._waiter.clear()
+        tracer.clear()
+        with tracer.span('measure', lane='cycle', device=device, secondary=secondary):
+            if self.asyncFlow:
+                raw_data = asyncio.run(self._rig.measure(device, secondary))
+            else:
+                raw_data = self._measure(device, secondary)
+        tracer.phase(None)
+        self._waiter.report()
+        if self.pnaStates is not None:
+            self.pnaStates.report()
+        self.measurements.report()
+        self._trace_report('measure')
         self.hasResult = bool(raw_data)
+        self.phases = tracer.phase_totals()
 
         if self.hasResult:
             self.result.process_raw_data(device, secondary, raw_data)
+            if self.resultSink is not None:
+                self.resultSink.append(device, secondary, self.result.headers, self.result.data,
+                                       phases=self.phases)
+        self._archiveTraces(device, secondary)
+
+    def _archiveTraces(self, device, secondary):
+        check = self.checkTraces.pop((device, secondary), None)
+        if self.traceArchive is None or not (check or self.harmonicTraces):
+            return
+        path, index = self.traceArchive.append(device, secondary, check=check, axes=self.harmonicAxes(),
+                                               traces=self.harmonicTraces)
+        print(f'traces archived to {path} #{index}')
+
+    user_preset_name = r'C:\Program Files\Agilent\Network Analyzer\Documents\UserPreset.sta'
+    # measurements the preset setup defines, one per harmonic
+    state_measurements = tuple(MeasurementRegistry.measurements)
+
+    def _pna_init(self, param=None):
+        if self.pnaStates is None or param is None:
+            return self._pna_setup(param)
+        # the saved state is the analyzer fully set up for the sweep plan, a different plan is a different state
+        key = self.pnaStates.key(param.calset, self.user_preset_name, self.sweep.settings())
+        state = self.pnaStates.restore(self._instruments['Анализатор'], self.requiredInstruments['Анализатор'].addr,
+                                       key, build=lambda: self._pna_build(param))
+        if state == 'recalled':
+            self.measurements.reset(self.state_measurements)
+        print(f'analyzer state for {param.name}: {state}')
+
+    def _pna_build(self, param):
+        self._pna_setup(param)
+        self._syncAnalyzer()
+        self._setupHarmonicChannels()
+
+    def _pna_setup(self, param=None):
+        user_preset_name = self.user_preset_name
+
+        with self._batched('Анализатор'):
+            self._instruments['Анализатор'].send('SYST:PRES')
+            self._instruments['Анализатор'].query('*OPC?')
+
+            self._instruments['Анализатор'].send(f'SYST:UPR:LOAD "{user_preset_name}"')
+            self._instruments['Анализатор'].send(f'SYST:UPR')
+
+            self._instruments['Анализатор'].send('CALC:PAR:DEL:ALL')
+            # self._instruments['Анализатор'].send('DISP:WIND2 ON')
+
+            self.measurements.reset()
+            for name in self.state_measurements:   # TODO use required meas param
+                self.measurements.ensure(self._instruments['Анализатор'], name)
+            self._instruments['Анализатор'].send('DISP:WIND1:TRAC1:Y:SCAL:AUTO')
 
-    def _pna_init(self):
-        user_preset_name = r'C:\Program Files\Agilent\Network Analyzer\Documents\UserPreset.sta'
-
-        self._instruments['Анализатор'].send('SYST:PRES')
-        self._instruments['Анализатор'].query('*OPC?')
-
-        self._instruments['Анализатор'].send(f'SYST:UPR:LOAD "{user_preset_name}"')
-        self._instruments['Анализатор'].send(f'SYST:UPR')
-
-        self._instruments['Анализатор'].send('CALC:PAR:DEL:ALL')
-        # self._instruments['Анализатор'].send('DISP:WIND2 ON')
-
-        self._instruments['Анализатор'].send('CALC1:PAR:DEF "MEAS_1",B,1')   # TODO use required meas param
-        self._instruments['Анализатор'].send('CALC1:FORM MLOG')
-        self._instruments['Анализатор'].send('DISP:WIND1:TRAC1:FEED "MEAS_1"')
-        self._instruments['Анализатор'].send('DISP:WIND1:TRAC1:Y:SCAL:AUTO')
-
-        # c:\program files\agilent\newtowrk analyzer\UserCalSets
-        # self._instruments['Анализатор'].send('SENS1:CORR:CSET:ACT "-20dBm_1.1-1.4G",1')
+            # c:\program files\agilent\newtowrk analyzer\UserCalSets
+            if param is not None and param.calset:
+                for name in self.state_measurements:
+                    self._instruments['Анализатор'].send(
+                        f'SENS{self.measurements.channel(name)}:CORR:CSET:ACT "{param.calset}",1')
 
     def _syncRig(self):
-        sweep_points = 301
-        smooth_points = 30
-
-        self._instruments['Анализатор'].send(f'TRIG:SOUR EXT')
-        self._instruments['Анализатор'].send(f'TRIG:SCOP CURR')
-        self._instruments['Анализатор'].send(f'SENS1:SWE:MODE CONT')
-        self._instruments['Анализатор'].send(f'SENS1:SWE:TRIG:MODE POIN')
-
-        # self._instruments['Анализатор'].send(f'TRIG:ROUTE:INP MAIN')   # error TODO replace with preset load
-        self._instruments['Анализатор'].send(f'TRIG:TYPE EDGE')
-        self._instruments['Анализатор'].send(f'TRIG:SLOP POS')
-        self._instruments['Анализатор'].send(f'CONT:SIGN:TRIG:ATBA ON')
-        self._instruments['Анализатор'].send(f'TRIG:READ:POL LOW')
-
-        self._instruments['Анализатор'].send(f'TRIG:CHAN1:AUX1 ON')
-        self._instruments['Анализатор'].send(f'TRIG:CHAN1:AUX1:OPOL POS')
-        self._instruments['Анализатор'].send(f'TRIG:CHAN1:AUX1:POS AFT')
-        # self._instruments['Анализатор'].send(f'TRIG:CHAN1:AUX1:DUR?')
-        self._instruments['Анализатор'].send(f'SENS1:SWE:POIN {sweep_points}')
-        self._instruments['Анализатор'].send(f'SENS1:FOM ON')
-
-        # ass plot smothing
-        self._instruments['Анализатор'].send(f'CALC1:SMO ON')
-        self._instruments['Анализатор'].send(f'CALC1:SMO:POIN {smooth_points}')
-
-        # self._instruments['Генератор'].set_pow(value=15, unit='dBm')
-
-        self._instruments['Генератор'].send(f':FREQ:MODE LIST')
-        self._instruments['Генератор'].send(f':LIST:TYPE STEP')
-        self._instruments['Генератор'].send(f':INIT:CONT OFF')
-        self._instruments['Генератор'].send(f':SWE:POIN {sweep_points}')
-        self._instruments['Генератор'].send(f':LIST:TRIG:SOUR EXT')
-        self._instruments['Генератор'].send(f':LIST:MODE AUTO')
-        self._instruments['Генератор'].send(f':TRIG:SOUR IMM')
-        self._instruments['Генератор'].send(f':POW:ATT:AUTO ON')
-
+        self._syncAnalyzer()
+        self._syncGenerator()
+        self._setupHarmonicChannels()
         self._set_harmonic(harmonic=1)
 
-        # self._instruments['Генератор'].send('SWE:DWEL .5')
-        # self._instruments['Генератор'].send('INIT')
+    def _syncAnalyzer(self):
+        with self._batched('Анализатор'):
+            self.measurements.select(self._instruments['Анализатор'], 'MEAS_1')
+            self._instruments['Анализатор'].send(f'TRIG:SOUR EXT')
+            self._instruments['Анализатор'].send(f'TRIG:SCOP CURR')
+            self._instruments['Анализатор'].send(f'SENS1:SWE:MODE CONT')
+            self._instruments['Анализатор'].send(f'SENS1:SWE:TRIG:MODE POIN')
+
+            # self._instruments['Анализатор'].send(f'TRIG:ROUTE:INP MAIN')   # error TODO replace with preset load
+            self._instruments['Анализатор'].send(f'TRIG:TYPE EDGE')
+            self._instruments['Анализатор'].send(f'TRIG:SLOP POS')
+            self._instruments['Анализатор'].send(f'CONT:SIGN:TRIG:ATBA ON')
+            self._instruments['Анализатор'].send(f'TRIG:READ:POL LOW')
+
+            self._instruments['Анализатор'].send(f'TRIG:CHAN1:AUX1 ON')
+            self._instruments['Анализатор'].send(f'TRIG:CHAN1:AUX1:OPOL POS')
+            self._instruments['Анализатор'].send(f'TRIG:CHAN1:AUX1:POS AFT')
+            # self._instruments['Анализатор'].send(f'TRIG:CHAN1:AUX1:DUR?')
+            self._instruments['Анализатор'].send(f'SENS1:SWE:POIN {self.sweep.points}')
+            self._instruments['Анализатор'].send(f'SENS1:FOM ON')
+
+            # ass plot smothing
+            self._instruments['Анализатор'].send(f'CALC1:SMO ON')
+            self._instruments['Анализатор'].send(f'CALC1:SMO:POIN {self.sweep.smooth}')
+
+    def _syncGenerator(self):
+        with self._batched('Генератор'):
+            # self._instruments['Генератор'].set_pow(value=15, unit='dBm')
+
+            self._instruments['Генератор'].send(f':FREQ:MODE LIST')
+            self._instruments['Генератор'].send(f':LIST:TYPE STEP')
+            self._instruments['Генератор'].send(f':INIT:CONT OFF')
+            self._instruments['Генератор'].send(f':SWE:POIN {self.sweep.points}')
+            self._instruments['Генератор'].send(f':LIST:TRIG:SOUR EXT')
+            self._instruments['Генератор'].send(f':LIST:MODE AUTO')
+            self._instruments['Генератор'].send(f':TRIG:SOUR IMM')
+            self._instruments['Генератор'].send(f':POW:ATT:AUTO ON')
+
+            # self._instruments['Генератор'].send('SWE:DWEL .5')
+            # self._instruments['Генератор'].send('INIT')
+
+    harmonics = [1, 2, 3, 4]
+
+    # analyzer receiver range per harmonic, source GHz
+    harm_offset = {
+        1: (0.1, 40),
+        2: (0.1, 25),
+        3: (0.1, 16.6),
+        4: (0.1, 12.5)
+    }
 
     def _set_harmonic(self, harmonic=1):
-        harm_offset = {
-            1: (0.1, 40),
-            2: (0.1, 25),
-            3: (0.1, 16.6),
-            4: (0.1, 12.5)
-        }
+        self._setAnalyzerHarmonic(harmonic)
+        self._setGeneratorHarmonic(harmonic)
+
+    def _setAnalyzerHarmonic(self, harmonic):
+        # every harmonic has its own measurement in its own channel, TRIG:SCOP CURR sweeps the selected one
+        self.measurements.select(self._instruments['Анализатор'], f'MEAS_{harmonic}')
+
+    def _setAnalyzerRange(self, start, stop, harmonic, ifbw):
+        # the harmonic's channel
+        ch = harmonic
+        with self._instruments['Анализатор'].batch():
+            self._instruments['Анализатор'].send(f'SENS{ch}:FOM:RANG1:FREQ:STAR {start}GHz')
+            self._instruments['Анализатор'].send(f'SENS{ch}:FOM:RANG1:FREQ:STOP {stop}GHz')
+            self._instruments['Анализатор'].send(f'SENS{ch}:FOM:RANG3:FREQ:MULT {harmonic}')
+            if ifbw is not None:
+                self._instruments['Анализатор'].send(f'SENS{ch}:BWID {ifbw}')
+
+    def _setGeneratorHarmonic(self, harmonic):
+        self._setGeneratorSpan(*self.sweep.span(harmonic))
+
+    def _setGeneratorSpan(self, start, stop):
+        with self._instruments['Генератор'].batch():
+            self._instruments['Генератор'].send(f':FREQ:STAR {start}GHz')
+            self._instruments['Генератор'].send(f':FREQ:STOP {stop}GHz')
+
+    def harmonicAxes(self):
+        # receiver frequencies of every harmonic trace as the FOM ranges set them up, not queried
+        return {h: self.sweep.axis(h) for h in self.harmonics}
+
+    def _invalidatePnaState(self):
+        if self.pnaStates is not None:
+            self.pnaStates.invalidate()
+
+    def _setupHarmonicChannels(self):
+        # one channel per harmonic with its own receiver range, nothing is reprogrammed between the sweeps.
+        # with point triggering TRIG:SCOP ALL walks the channels one after another, not in parallel,
+        # so every channel is selected and swept on its own under TRIG:SCOP CURR from _syncAnalyzer
+        with self._batched('Анализатор'):
+            for ch in self.harmonics:
+                # the measurements stay on the analyzer once defined, until the next preset or state recall
+                self.measurements.ensure(self._instruments['Анализатор'], f'MEAS_{ch}')
+                if ch != 1:
+                    # channel 1 gets the same from _syncAnalyzer
+                    self._instruments['Анализатор'].send(f'SENS{ch}:SWE:MODE CONT')
+                    self._instruments['Анализатор'].send(f'SENS{ch}:SWE:TRIG:MODE POIN')
+                    self._instruments['Анализатор'].send(f'SENS{ch}:FOM ON')
+                    self._instruments['Анализатор'].send(f'CALC{ch}:SMO ON')
+                    # the generator steps its list on the aux trigger of whichever channel is sweeping
+                    self._instruments['Анализатор'].send(f'TRIG:CHAN{ch}:AUX1 ON')
+                    self._instruments['Анализатор'].send(f'TRIG:CHAN{ch}:AUX1:OPOL POS')
+                    self._instruments['Анализатор'].send(f'TRIG:CHAN{ch}:AUX1:POS AFT')
+                    self._instruments['Анализатор'].send(f'SENS{ch}:SWE:POIN {self.sweep.points}')
+                    self._instruments['Анализатор'].send(f'CALC{ch}:SMO:POIN {self.sweep.smooth}')
+                self._setAnalyzerRange(*self.sweep.span(ch), ch, self.sweep.ifbw)
+
+    def _query_harmonic_traces(self):
+        questions = [f'CALC{ch}:DATA? FDATA' for ch in self.harmonics]
+        if not self.binaryTransfer:
+            return [self._query_trace(q) for q in questions]
+        # all channels in one compound query, answers come back as consecutive blocks
+        transport = self.requiredInstruments['Анализатор'].transport
+        transport.write(';:'.join(questions))
+        return tracedata.read_blocks(transport, len(questions))
+
+    def _syncAnalyzerDelta(self, session):
+        # the check may leave its channel on the narrow refine span, only what differs is sent again
+        if 'channels' not in session.steps or 'check' in session.steps:
+            self._setupHarmonicChannels()
+
+    def _syncGeneratorDelta(self, param, session):
+        # static current drives the generator directly, restore its list sweep
+        if param.hasStatic:
+            self._syncGenerator()
+        if param.hasStatic or 'check' in session.steps:
+            self._setGeneratorHarmonic(1)
+
+    def _generatorReset(self):
+        self._instruments['Генератор'].send('*CLS')
+        self._instruments['Генератор'].set_modulation(state='OFF')
+        self._instruments['Генератор'].send(f':POW:ATT:AUTO ON')
+
+    def _generatorOn(self, pow, freq=None):
+        if freq is not None:
+            self._instruments['Генератор'].set_freq(value=freq, unit='GHz')
+        self._instruments['Генератор'].set_pow(value=pow, unit='dBm')
+        self._instruments['Генератор'].set_output(state='ON')
+
+    def _generatorOff(self):
+        self._instruments['Генератор'].set_output(state='OFF')
 
-        self._instruments['Анализатор'].send(f'SENS1:FOM:RANG1:FREQ:STAR {harm_offset[harmonic][0]}GHz')
-        self._instruments['Анализатор'].send(f'SENS1:FOM:RANG1:FREQ:STOP {harm_offset[harmonic][1]}GHz')
-        self._instruments['Анализатор'].send(f'SENS1:FOM:RANG3:FREQ:MULT {harmonic}')
+    def _sourceOn(self, current, voltage):
+        self._instruments['Источник питания'].set_current(chan=1, value=current, unit='mA')
+        self._instruments['Источник питания'].set_voltage(chan=1, value=voltage, unit='V')
+        self._instruments['Источник питания'].set_output(chan=1, state='ON')
 
-        self._instruments['Генератор'].send(f':FREQ:STAR {harm_offset[harmonic][0]}GHz')
-        self._instruments['Генератор'].send(f':FREQ:STOP {harm_offset[harmonic][1]}GHz')
+    def _sourceOff(self):
+        self._instruments['Источник питания'].set_output(chan=1, state='OFF')
 
-    def _measure(self, device, secondary):
+    def _displayCurrent(self, data):
+        # TODO adjust current value gen towards new algorithm
+        curr = int(MeasureResultMock.generate_value(data) * 10)
+        curr_str = ' 00.' + f'{curr}  ADC'.replace('.', ',')
+        self._instruments['Мультиметр'].send(f'DISPlay:WIND1:TEXT "{curr_str}"')
+
+    def _readHarmonicTraces(self, phase):
+        # the measure has no use for the traces themselves, they are read back only to archive them,
+        # every channel keeps its trace, all of them come in one transfer after the last sweep
+        if self.traceArchive is not None:
+            with tracer.span('harmonics read'):
+                self.harmonicTraces[phase] = dict(zip(self.harmonics, self._query_harmonic_traces()))
+
+    def _harmonicSweeps(self, phase):
+        for mul in self.harmonics:
+            with tracer.span(f'harmonic {mul}'):
+                self._set_harmonic(harmonic=mul)
+                self._instruments['Генератор'].send(f':INIT')
+                self._instruments['Генератор'].query('*OPC?')
+                #if not mock_enabled:
+                #    time.sleep(0.3)
+                self._instruments['Анализатор'].send(f'DISP:WIND1:TRAC{mul}:Y:SCAL:AUTO')
+                #if not mock_enabled:
+                #    time.sleep(0.3)
+        self._readHarmonicTraces(phase)
+
+    def _measure(self, device, secondary_index):
+        self.harmonicTraces.clear()
         param = self.deviceParams[device]
-        secondary = self.secondaryParams[secondary]
+        secondary = self.secondaryParams[secondary_index]
         print(f'launch measure with {param} {secondary}')
+        session = self._takeSession((device, secondary_index))
+        self._planSweep(param)
 
-        self._instruments['Генератор'].send('*CLS')
-        self._instruments['Генератор'].set_modulation(state='OFF')
-        self._instruments['Генератор'].send(f':POW:ATT:AUTO ON')
-
-        self._pna_init()
+        tracer.phase('pna init')
+        if session is None:
+            self._generatorReset()
+            self._pna_init(param)
 
         # TODO extract static measure func
         # ===
-        if param['Istat'][0][0] is not None:
-            self._instruments['Источник питания'].set_current(chan=1, value=420, unit='mA')
-            self._instruments['Источник питания'].set_voltage(chan=1, value=5.55, unit='V')
-            self._instruments['Источник питания'].set_output(chan=1, state='ON')
-
-            self._instruments['Генератор'].set_freq(value=param['F'], unit='GHz')
-            self._instruments['Генератор'].set_pow(value=param['Pmax'], unit='dBm')
-            self._instruments['Генератор'].set_output(state='ON')
+        tracer.phase('static current')
+        if param.hasStatic:
+            self._sourceOn(current=420, voltage=5.55)
+            self._generatorOn(pow=param.Pmax, freq=param.F)
+            self._displayCurrent(param.Istat[secondary])
 
-            # TODO adjust current value gen towards new algorithm
-            curr = int(MeasureResultMock.generate_value(param['Istat'][secondary]) * 10)
-            curr_str = ' 00.' + f'{curr}  ADC'.replace('.', ',')
-            self._instruments['Мультиметр'].send(f'DISPlay:WIND1:TEXT "{curr_str}"')
+            self._settle('static current')
 
-            if not mock_enabled:
-                time.sleep(3)
-
-            self._instruments['Генератор'].set_output(state='OFF')
-            self._instruments['Источник питания'].set_output(chan=1, state='OFF')
+            self._generatorOff()
+            self._sourceOff()
             # self._instruments['Мультиметр'].send(f'SYST:PRES')
 
-        self._syncRig()
+        tracer.phase('rig sync')
+        if session is None:
+            self._syncRig()
+        else:
+            self._syncAnalyzerDelta(session)
+            self._syncGeneratorDelta(param, session)
 
         # TODO extract dynamic measure func
         # ===
-        if param['Istat'][0][0] is not None:
-            self._instruments['Источник питания'].set_current(chan=1, value=300, unit='mA')
-            self._instruments['Источник питания'].set_voltage(chan=1, value=4.45, unit='V')
-            self._instruments['Источник питания'].set_output(chan=1, state='ON')
+        if param.hasStatic:
+            self._sourceOn(current=300, voltage=4.45)
 
         # TODO extract pow sweep
         # ===
-        self._instruments['Генератор'].set_pow(value=param['Pmin'], unit='dBm')
-        # self._instruments['Генератор'].set_freq(value=param['F'], unit='GHz')
-        self._instruments['Генератор'].set_output(state='ON')
-
-        if param['Idyn'][0][0] is not None:
-            curr = int(MeasureResultMock.generate_value(param['Idyn'][secondary]) * 10)
-            curr_str = ' 00.' + f'{curr}  ADC'.replace('.', ',')
-            self._instruments['Мультиметр'].send(f'DISPlay:WIND1:TEXT "{curr_str}"')
-
-        for mul in [1, 2, 3, 4]:
-            self._set_harmonic(harmonic=mul)
-            self._instruments['Генератор'].send(f':INIT')
-            self._instruments['Генератор'].query('*OPC?')
-            #if not mock_enabled:
-            #    time.sleep(0.3)
-            self._instruments['Анализатор'].send('DISP:WIND1:TRAC1:Y:SCAL:AUTO')
-            #if not mock_enabled:
-            #    time.sleep(0.3)
+        tracer.phase('power sweep')
+        self._generatorOn(pow=param.Pmin)
+        if param.hasDynamic:
+            self._displayCurrent(param.Idyn[secondary])
+        self._set_transfer_format()
+        self._harmonicSweeps('power sweep')
 
         # TODO extract freq sweep func
         # ===
-        self._instruments['Генератор'].set_pow(value=param['Pmax'], unit='dBm')
-        # self._instruments['Генератор'].set_freq(value=param['F'], unit='GHz')
-        self._instruments['Генератор'].set_output(state='ON')
-
-        if param['Idyn'][0][0] is not None:
-            curr = int(MeasureResultMock.generate_value(param['Idyn'][secondary]) * 10)
-            curr_str = ' 00.' + f'{curr}  ADC'.replace('.', ',')
-            self._instruments['Мультиметр'].send(f'DISPlay:WIND1:TEXT "{curr_str}"')
-
-        for mul in [1, 2, 3, 4]:
-            self._set_harmonic(harmonic=mul)
-            self._instruments['Генератор'].send(f':INIT')
-            self._instruments['Генератор'].query('*OPC?')
-            #if not mock_enabled:
-            #    time.sleep(0.3)
-            self._instruments['Анализатор'].send('DISP:WIND1:TRAC1:Y:SCAL:AUTO')
-            #if not mock_enabled:
-            #    time.sleep(0.3)
-
-        self._instruments['Анализатор'].send('CALC:PAR:DEL:ALL')
+        tracer.phase('frequency sweep')
+        self._generatorOn(pow=param.Pmax)
+        if param.hasDynamic:
+            self._displayCurrent(param.Idyn[secondary])
+        self._harmonicSweeps('frequency sweep')
 
+        tracer.phase('teardown')
         self._instruments['Мультиметр'].send(f'SYST:PRES')
-        self._instruments['Генератор'].set_output(state='OFF')
-        self._instruments['Источник питания'].set_output(chan=1, state='OFF')
+        self._generatorOff()
+        self._sourceOff()
+        tracer.phase(None)
 
         return ['ok'], 'ok'
 
@@ -0,0 +1,126 @@
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+def load_jobs(filename):
+    # one job per line: <device>;<secondary>, lines starting with # are skipped
+    jobs = list()
+    with open(filename, 'rt', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            device, _, secondary = line.rpartition(';')
+            jobs.append((device.strip(), int(secondary)))
+    return jobs
+
+
+class JobResult:
+    def __init__(self, device, secondary):
+        self.device = device
+        self.secondary = secondary
+        self.present = False
+        self.measured = False
+        self.headers = list()
+        self.data = list()
+        # job steps: swap, prepare, ready, check, measure
+        self.timings = dict()
+        # measure phases as the controller logs them: pna init, static current, power sweep...
+        self.phases = dict()
+        self.rig = None
+        # exception that stopped this job, the queue goes on with the next one
+        self.error = None
+
+    def __str__(self):
+        timings = ', '.join(f'{k}={v:.2f}s' for k, v in self.timings.items())
+        if self.error:
+            status = f'error: {self.error}'
+        else:
+            status = 'ok' if self.measured else 'sample not found' if not self.present else 'measure error'
+        rig = f'[{self.rig}] ' if self.rig else ''
+        return f'{rig}{self.device} {self.secondary}: {status} ({timings})'
+
+
+class MeasureJobQueue:
+    def __init__(self, controller, swap=None, report=None):
+        self._controller = controller
+        # swap(job) blocks while the fixture is changed, report(result) is called after each job
+        self._swap = swap
+        self._report = report
+        self.results = list()
+        self.elapsed = 0.0
+
+    def run(self, jobs, stats=True):
+        # jobs may be any iterable, the rig pool feeds its workers one job at a time
+        total = f'/{len(jobs)}' if hasattr(jobs, '__len__') else ''
+        self.results.clear()
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            for i, job in enumerate(jobs):
+                result = JobResult(*job)
+                try:
+                    self._run_job(pool, job, result)
+                except Exception as ex:
+                    result.error = repr(ex)
+
+                self.results.append(result)
+                print(f'job {i + 1}{total}: {result}')
+                if self._report is not None:
+                    self._report(result)
+
+        self.elapsed = time.perf_counter() - start
+        if stats:
+            self.print_stats()
+        return self.results
+
+    def _run_job(self, pool, job, result):
+        # configure the rig for this job while the operator swaps the fixture
+        t0 = time.perf_counter()
+        prepared = pool.submit(self._timed, self._controller.prepare, job)
+        try:
+            if self._swap is not None:
+                self._swap(job)
+            result.timings['swap'] = time.perf_counter() - t0
+        finally:
+            # never leave prepare running into the next job
+            result.timings['prepare'] = prepared.result()
+        result.timings['ready'] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        self._controller.check(job)
+        result.present = self._controller.present
+        result.timings['check'] = time.perf_counter() - t0
+
+        if result.present:
+            t0 = time.perf_counter()
+            self._controller.measure(job)
+            result.measured = self._controller.hasResult
+            result.timings['measure'] = time.perf_counter() - t0
+            result.phases = dict(self._controller.phases)
+            if result.measured:
+                result.headers = list(self._controller.result.headers)
+                result.data = list(self._controller.result.data)
+
+    @staticmethod
+    def _timed(fn, *args):
+        t0 = time.perf_counter()
+        fn(*args)
+        return time.perf_counter() - t0
+
+    def print_stats(self):
+        print_stats(self.results, self.elapsed)
+
+
+def print_stats(results, elapsed):
+    if not results:
+        return
+    done = sum(r.measured for r in results)
+    errors = sum(bool(r.error) for r in results)
+    print(f'jobs: {len(results)}, measured: {done}, errors: {errors}, total: {elapsed:.2f}s, '
+          f'{len(results) / max(elapsed, 1e-9) * 3600:.0f} DUT/hour')
+    for phase in ['swap', 'prepare', 'ready', 'check', 'measure']:
+        values = [r.timings[phase] for r in results if phase in r.timings]
+        if values:
+            print(f'  {phase:<8} mean {sum(values) / len(values):.2f}s, max {max(values):.2f}s')
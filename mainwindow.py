@@ -1,11 +1,12 @@
-from PyQt5 import uic
-from PyQt5.QtWidgets import QMainWindow, QMessageBox, QDialog, QAction
+from PyQt5.QtWidgets import QMainWindow, QMessageBox, QDialog, QAction, QFileDialog
 from PyQt5.QtCore import Qt, QStateMachine, QState, pyqtSignal, pyqtSlot
 
 from instrumentcontroller import InstrumentController
 from connectionwidget import ConnectionWidget
 from measuremodel import MeasureModel
 from measurewidget import MeasureWidget, MeasureWidgetWithSecondaryParameters
+from resultsink import read_results
+from uiloader import load_ui
 
 
 class MainWindow(QMainWindow):
@@ -21,7 +22,7 @@ class MainWindow(QMainWindow):
         self.setAttribute(Qt.WA_DeleteOnClose)
 
         # create instance variables
-        self._ui = uic.loadUi('mainwindow.ui', self)
+        self._ui = load_ui('mainwindow.ui', self)
         self._instrumentController = InstrumentController(parent=self)
         self._connectionWidget = ConnectionWidget(parent=self, controller=self._instrumentController)
         self._measureWidget = MeasureWidgetWithSecondaryParameters(parent=self, controller=self._instrumentController)
@@ -38,6 +39,7 @@ class MainWindow(QMainWindow):
         self._connectionWidget.connected.connect(self._measureWidget.on_instrumentsConnected)
 
         self._measureWidget.measureComplete.connect(self._measureModel.update)
+        self._measureWidget.jobMeasured.connect(self._measureModel.appendResult)
 
         self._ui.tableMeasure.setModel(self._measureModel)
 
@@ -62,6 +64,26 @@ class MainWindow(QMainWindow):
     def resizeEvent(self, event):
         self.refreshView()
 
+    def closeEvent(self, event):
+        self._instrumentController.deviceParams.stop()
+        self._instrumentController.disconnect()
+        super().closeEvent(event)
+
+    @pyqtSlot()
+    def on_actHistory_triggered(self):
+        filename, _ = QFileDialog.getOpenFileName(self, 'Журнал результатов', 'results', 'Журнал (*.arrows);;Все файлы (*)')
+        if not filename:
+            return
+        try:
+            table = read_results(filename)
+        except Exception as ex:
+            QMessageBox.warning(self, 'Ошибка', f'Не удалось прочитать журнал: {ex}')
+            return
+        count = self._measureModel.loadHistory((r['device'], r['secondary'], r['headers'], r['values'])
+                                               for r in table.to_pylist())
+        self.statusBar().showMessage(f'{filename}: {count} строк')
+        self.refreshView()
+
     @pyqtSlot()
     def on_instrumens_connected(self):
         print(f'connected {self._instrumentController}')
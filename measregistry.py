@@ -0,0 +1,50 @@
+class MeasurementRegistry:
+    # analyzer measurements defined once and kept while the analyzer state lives,
+    # switched with CALC:PAR:SEL instead of CALC:PAR:DEL:ALL and redefining them every cycle
+
+    # name: channel, parameter, window trace; one per harmonic, the check uses the test harmonic's
+    measurements = {
+        'MEAS_1': (1, 'B,1', 1),
+        'MEAS_2': (2, 'B,2', 2),
+        'MEAS_3': (3, 'B,3', 3),
+        'MEAS_4': (4, 'B,4', 4),
+    }
+
+    def __init__(self):
+        self._defined = set()
+        self.active = None
+        self.stats = {'defined': 0, 'kept': 0, 'selected': 0}
+
+    def reset(self, defined=()):
+        # the analyzer state was replaced by a preset or a state recall, these are what it brought along
+        self._defined = set(defined)
+        # which one a recalled state has selected is not known
+        self.active = None
+
+    def channel(self, name):
+        return self.measurements[name][0]
+
+    def ensure(self, instrument, name):
+        if name in self._defined:
+            self.stats['kept'] += 1
+            return False
+        ch, parameter, trace = self.measurements[name]
+        instrument.send(f'CALC{ch}:PAR:DEF "{name}",{parameter}')
+        instrument.send(f'CALC{ch}:FORM MLOG')
+        instrument.send(f'DISP:WIND1:TRAC{trace}:FEED "{name}"')
+        # CALC:PAR:DEF does not select the new measurement, the active one stays as it was
+        self._defined.add(name)
+        self.stats['defined'] += 1
+        return True
+
+    def select(self, instrument, name):
+        # the selected measurement's channel is the one TRIG:SCOP CURR triggers
+        self.ensure(instrument, name)
+        if self.active == name:
+            return
+        instrument.send(f'CALC{self.channel(name)}:PAR:SEL "{name}"')
+        self.active = name
+        self.stats['selected'] += 1
+
+    def report(self):
+        print('analyzer measurements: ' + ', '.join(f'{k} {v}' for k, v in self.stats.items()))
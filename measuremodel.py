@@ -1,52 +1,176 @@
-from PyQt5.QtCore import Qt, QAbstractTableModel, QVariant
+import numpy
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant
+
+
+class ColumnStore:
+    # measurement history as growable float64 columns, devices as indices into a name table
+
+    def __init__(self, capacity=256):
+        self._capacity = capacity
+        self.size = 0
+
+        self.headers = list()
+        self._columns = list()
+        self._deviceNames = list()
+        self._deviceIndex = dict()
+        self._devices = numpy.zeros(capacity, dtype=numpy.int32)
+        self._secondary = numpy.zeros(capacity, dtype=numpy.int32)
+        self._headerIndex = dict()
+
+    def append(self, device, secondary, headers, values):
+        if self.size == self._capacity:
+            self._grow()
+
+        new_headers = self.add_headers(headers)
+
+        if device not in self._deviceIndex:
+            self._deviceIndex[device] = len(self._deviceNames)
+            self._deviceNames.append(device)
+
+        row = self.size
+        self._devices[row] = self._deviceIndex[device]
+        self._secondary[row] = secondary
+        for h, v in zip(headers, values):
+            try:
+                self._columns[self._headerIndex[h]][row] = float(v)
+            except (TypeError, ValueError):
+                pass
+        self.size += 1
+        return new_headers
+
+    def add_headers(self, headers):
+        new_headers = self.missing(headers)
+        for h in new_headers:
+            self._headerIndex[h] = len(self.headers)
+            self.headers.append(h)
+            self._columns.append(numpy.full(self._capacity, numpy.nan))
+        return new_headers
+
+    def missing(self, headers):
+        return [h for h in headers if h not in self._headerIndex]
+
+    def device(self, row):
+        return self._deviceNames[self._devices[row]]
+
+    def secondary(self, row):
+        return int(self._secondary[row])
+
+    def value(self, row, column):
+        return self._columns[column][row]
+
+    def _grow(self):
+        self._capacity *= 2
+        self._devices = numpy.resize(self._devices, self._capacity)
+        self._secondary = numpy.resize(self._secondary, self._capacity)
+        for i, col in enumerate(self._columns):
+            grown = numpy.full(self._capacity, numpy.nan)
+            grown[:len(col)] = col
+            self._columns[i] = grown
 
 
 class MeasureModel(QAbstractTableModel):
+
+    fixedHeaders = ['Прибор', 'Калибровка']
+    fetchBatch = 256
+
     def __init__(self, parent=None, controller=None):
         super().__init__(parent)
 
         self._controller = controller
 
-        self._data = list()
-        self._headers = list()
+        self._store = ColumnStore()
+        self._fetched = 0
+
+    def update(self):
+        result = self._controller.result
+        self.appendResult(result.device, result.secondary, result.headers, result.data)
 
-        self._init()
+    def appendResult(self, device, secondary, headers, values):
+        new_headers = self._store.missing(headers)
+        if new_headers:
+            first = self.columnCount()
+            self.beginInsertColumns(QModelIndex(), first, first + len(new_headers) - 1)
+            self._store.append(device, secondary, headers, values)
+            self.endInsertColumns()
+        else:
+            self._store.append(device, secondary, headers, values)
 
-    def _init(self):
-        self._initHeader()
+        # a live row shows up at once when the view has everything before it,
+        # behind a loaded history it waits for fetchMore like the rest
+        if self._fetched == self._store.size - 1:
+            self.beginInsertRows(QModelIndex(), self._fetched, self._fetched)
+            self._fetched += 1
+            self.endInsertRows()
 
-    def _initHeader(self):
-        self.beginResetModel()
-        self._headers = self._controller.result.headers
-        self.endResetModel()
+    def loadHistory(self, rows):
+        # rows of an earlier result log go to the store only, the view pulls them in by fetchMore as it scrolls
+        rows = list(rows)
+        new_headers = list(dict.fromkeys(h for _, _, headers, _ in rows for h in self._store.missing(headers)))
+        if new_headers:
+            first = self.columnCount()
+            self.beginInsertColumns(QModelIndex(), first, first + len(new_headers) - 1)
+            self._store.add_headers(new_headers)
+            self.endInsertColumns()
+        for device, secondary, headers, values in rows:
+            self._store.append(device, secondary, headers, values)
+        # the first batch, the view asks for more only once it has rows to scroll through
+        self.fetchMore()
+        return len(rows)
 
-    def update(self):
-        self._init()
+    def clear(self):
         self.beginResetModel()
-        self._data = self._controller.result.data
+        self._store = ColumnStore()
+        self._fetched = 0
         self.endResetModel()
 
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._fetched < self._store.size
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.fetchBatch, self._store.size - self._fetched)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._fetched, self._fetched + count - 1)
+        self._fetched += count
+        self.endInsertRows()
+
     def headerData(self, section, orientation, role=None):
         if orientation == Qt.Horizontal:
             if role == Qt.DisplayRole:
-                if section < len(self._headers):
-                    return QVariant(self._headers[section])
+                if section < len(self.fixedHeaders):
+                    return QVariant(self.fixedHeaders[section])
+                section -= len(self.fixedHeaders)
+                if section < len(self._store.headers):
+                    return QVariant(self._store.headers[section])
         return QVariant()
 
     def rowCount(self, parent=None, *args, **kwargs):
-        if parent.isValid():
+        if parent is not None and parent.isValid():
             return 0
-        return 1
+        return self._fetched
 
     def columnCount(self, parent=None, *args, **kwargs):
-        return len(self._headers)
+        return len(self.fixedHeaders) + len(self._store.headers)
 
     def data(self, index, role=None):
         if not index.isValid():
             return QVariant()
         if role == Qt.DisplayRole:
-            try:
-                return QVariant(self._data[index.column()])
-            except LookupError:
+            row, column = index.row(), index.column()
+            if row >= self._fetched:
+                return QVariant()
+            if column == 0:
+                return QVariant(self._store.device(row))
+            if column == 1:
+                return QVariant(self._store.secondary(row))
+            column -= len(self.fixedHeaders)
+            if column >= len(self._store.headers):
                 return QVariant()
+            value = self._store.value(row, column)
+            return QVariant('-' if value != value else float(value))
         return QVariant()
@@ -1,8 +1,11 @@
-from PyQt5 import uic
+import threading
+
 from PyQt5.QtCore import pyqtSlot, pyqtSignal, QRunnable, QThreadPool
-from PyQt5.QtWidgets import QWidget, QComboBox, QLabel, QMessageBox
+from PyQt5.QtWidgets import QWidget, QComboBox, QLabel, QMessageBox, QFileDialog
 
 from deviceselectwidget import DeviceSelectWidget
+from jobqueue import load_jobs
+from uiloader import load_ui
 
 
 class MeasureTask(QRunnable):
@@ -23,11 +26,14 @@ class MeasureWidget(QWidget):
 
     sampleFound = pyqtSignal()
     measureComplete = pyqtSignal()
+    jobMeasured = pyqtSignal(str, int, list, list)
+    paramsReloaded = pyqtSignal(list)
+    swapRequested = pyqtSignal(str, int)
 
     def __init__(self, parent=None, controller=None):
         super().__init__(parent=parent)
 
-        self._ui = uic.loadUi('measurewidget.ui', self)
+        self._ui = load_ui('measurewidget.ui', self)
         self._controller = controller
         self._threads = QThreadPool()
 
@@ -37,6 +43,14 @@ class MeasureWidget(QWidget):
 
         self._selectedDevice = self._devices.selected
 
+        # the store reloads in its watcher thread, the combo is refilled in the GUI thread
+        self.paramsReloaded.connect(self._devices.setDevices)
+        self._controller.deviceParams.subscribe(lambda params: self.paramsReloaded.emit(params.keys()))
+
+        # the job queue blocks in its worker thread until the operator confirms the fixture swap
+        self._swapDone = threading.Event()
+        self.swapRequested.connect(self.on_swapRequested)
+
     def check(self):
         print('checking...')
         self._modeDuringCheck()
@@ -73,6 +87,30 @@ class MeasureWidget(QWidget):
         self._modePreCheck()
         self.measureComplete.emit()
 
+    def runJobs(self, jobs):
+        print(f'running {len(jobs)} jobs...')
+        self._modeDuringMeasure()
+        self._threads.start(MeasureTask(self._controller.runJobs,
+                                        self.jobsComplete,
+                                        jobs,
+                                        swap=self.swapJob,
+                                        report=self.jobComplete))
+
+    def swapJob(self, job):
+        # called on the worker thread while the rig is prepared for the job
+        self._swapDone.clear()
+        self.swapRequested.emit(*job)
+        self._swapDone.wait()
+
+    def jobComplete(self, result):
+        # called on the worker thread, the signal carries the row over to the view
+        if result.measured:
+            self.jobMeasured.emit(result.device, result.secondary, result.headers, result.data)
+
+    def jobsComplete(self):
+        print('jobs complete')
+        self._modePreCheck()
+
     @pyqtSlot()
     def on_instrumentsConnected(self):
         self._modePreCheck()
@@ -87,6 +125,28 @@ class MeasureWidget(QWidget):
         print('start measure')
         self.measure()
 
+    @pyqtSlot()
+    def on_btnJobs_clicked(self):
+        filename, _ = QFileDialog.getOpenFileName(self, 'Файл заданий', '.', 'Задания (*.txt);;Все файлы (*)')
+        if not filename:
+            return
+        try:
+            jobs = load_jobs(filename)
+        except (OSError, ValueError) as ex:
+            QMessageBox.warning(self, 'Ошибка', f'Не удалось прочитать файл заданий: {ex}')
+            return
+        unknown = sorted({d for d, _ in jobs} - set(self._controller.deviceParams))
+        if unknown:
+            QMessageBox.warning(self, 'Ошибка', f'Неизвестные типы: {", ".join(unknown)}')
+            return
+        if jobs:
+            self.runJobs(jobs)
+
+    @pyqtSlot(str, int)
+    def on_swapRequested(self, device, secondary):
+        QMessageBox.information(self, 'Смена образца', f'Установите образец: {device}, {secondary}')
+        self._swapDone.set()
+
     @pyqtSlot(str)
     def on_selectedChanged(self, value):
         self._selectedDevice = value
@@ -94,26 +154,31 @@ class MeasureWidget(QWidget):
     def _modePreConnect(self):
         self._ui.btnCheck.setEnabled(False)
         self._ui.btnMeasure.setEnabled(False)
+        self._ui.btnJobs.setEnabled(False)
         self._devices.enabled = True
 
     def _modePreCheck(self):
         self._ui.btnCheck.setEnabled(True)
         self._ui.btnMeasure.setEnabled(False)
+        self._ui.btnJobs.setEnabled(True)
         self._devices.enabled = True
 
     def _modeDuringCheck(self):
         self._ui.btnCheck.setEnabled(False)
         self._ui.btnMeasure.setEnabled(False)
+        self._ui.btnJobs.setEnabled(False)
         self._devices.enabled = False
 
     def _modePreMeasure(self):
         self._ui.btnCheck.setEnabled(False)
         self._ui.btnMeasure.setEnabled(True)
+        self._ui.btnJobs.setEnabled(False)
         self._devices.enabled = False
 
     def _modeDuringMeasure(self):
         self._ui.btnCheck.setEnabled(False)
         self._ui.btnMeasure.setEnabled(False)
+        self._ui.btnJobs.setEnabled(False)
         self._devices.enabled = False
 
 
@@ -0,0 +1,77 @@
+import time
+
+# IEEE 488.2 status bits
+esr_opc = 0x01
+stb_esb = 0x20
+
+
+class OperationWaiter:
+    def __init__(self, mode='opc', poll=0.02):
+        self.mode = mode
+        self.poll = poll
+        self.timings = list()
+
+    def wait(self, instrument, step, timeout=5.0, transport=None, mode=None):
+        mode = mode or self.mode
+        start = time.perf_counter()
+        try:
+            done = getattr(self, f'_wait_{mode}')(instrument, transport, timeout)
+        except Exception as ex:
+            print(f'{step} wait error:', ex)
+            done = False
+        elapsed = time.perf_counter() - start
+        self.timings.append((step, mode, elapsed, done))
+        if not done:
+            print(f'{step}: operation not complete after {timeout}s')
+        return done
+
+    def report(self):
+        for step, mode, elapsed, done in self.timings:
+            print(f'{step:<30} {mode:<4} {elapsed * 1000:8.1f} ms{"" if done else "  timeout"}')
+
+    def clear(self):
+        self.timings.clear()
+
+    def _wait_opc(self, instrument, transport, timeout):
+        if transport is None or not hasattr(transport, 'timeout'):
+            instrument.query('*OPC?')
+            return True
+        old, transport.timeout = transport.timeout, int(timeout * 1000)
+        try:
+            instrument.query('*OPC?')
+        finally:
+            transport.timeout = old
+        return True
+
+    def _clear_esr(self, instrument):
+        # reading the event status register clears it, an OPC bit left by an earlier command would end the wait at once
+        instrument.query('*ESR?')
+
+    def _wait_stb(self, instrument, transport, timeout):
+        self._clear_esr(instrument)
+        instrument.send('*ESE 1')
+        instrument.send('*OPC')
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            if self._read_stb(instrument, transport) & stb_esb:
+                instrument.query('*ESR?')
+                return True
+            time.sleep(self.poll)
+        return False
+
+    def _wait_srq(self, instrument, transport, timeout):
+        if transport is None or not hasattr(transport, 'wait_for_srq'):
+            return self._wait_stb(instrument, transport, timeout)
+        self._clear_esr(instrument)
+        instrument.send('*SRE 32')
+        instrument.send('*ESE 1')
+        instrument.send('*OPC')
+        transport.wait_for_srq(int(timeout * 1000))
+        instrument.query('*ESR?')
+        return True
+
+    @staticmethod
+    def _read_stb(instrument, transport):
+        if transport is not None and hasattr(transport, 'read_stb'):
+            return transport.read_stb()
+        return int(float(instrument.query('*STB?')))
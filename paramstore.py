@@ -0,0 +1,205 @@
+import ast
+import os
+import threading
+
+from numbers import Real
+
+from tablecache import CompiledFileCache
+
+giga = 1_000_000_000
+
+compiled_params = CompiledFileCache(prefix='paramstore')
+
+
+def _is_number(value):
+    return isinstance(value, Real) and not isinstance(value, bool)
+
+
+def _triple(value):
+    # (span, step, mean) limits, None - not measured for this calibration
+    if value is None or not isinstance(value, (list, tuple)) or len(value) != 3:
+        raise ValueError(f'expected [span, step, mean], got {value!r}')
+    if all(v is None for v in value):
+        return None
+    if not all(_is_number(v) for v in value):
+        raise ValueError(f'[span, step, mean] should be numbers, got {value!r}')
+    if value[1] <= 0:
+        raise ValueError(f'step should be positive, got {value!r}')
+    return tuple(float(v) for v in value)
+
+
+class DeviceParams:
+    # one validated params.ini entry, per-calibration current limits are precomputed tuples
+    __slots__ = ('name', 'F', 'Pmin', 'Pmax', 'Ftest', 'Ptest', 'harm', 'Istat', 'Idyn', 'calset', 'ifbw',
+                 'hasStatic', 'hasDynamic', 'checkable', 'checkFreq')
+
+    required = ('F', 'Pmin', 'Pmax', 'Istat', 'Idyn')
+    check = ('Ftest', 'Ptest', 'harm')
+    optional = ('calset', 'ifbw')
+
+    def __init__(self, name, raw):
+        if not isinstance(raw, dict):
+            raise ValueError(f'expected a dict, got {type(raw).__name__}')
+        missing = [k for k in self.required if k not in raw]
+        if missing:
+            raise ValueError(f'missing {", ".join(missing)}')
+        unknown = sorted(set(raw) - set(self.required) - set(self.check) - set(self.optional))
+        if unknown:
+            raise ValueError(f'unknown keys {", ".join(unknown)}')
+
+        for key in ('F', 'Pmin', 'Pmax') + self.check:
+            if key in raw and not _is_number(raw[key]):
+                raise ValueError(f'{key} should be a number, got {raw[key]!r}')
+        if raw['Pmin'] > raw['Pmax']:
+            raise ValueError(f'Pmin {raw["Pmin"]} is above Pmax {raw["Pmax"]}')
+        if 'harm' in raw and raw['harm'] not in (1, 2, 3, 4):
+            raise ValueError(f'harm should be 1..4, got {raw["harm"]!r}')
+        if 'calset' in raw and not isinstance(raw['calset'], str):
+            raise ValueError(f'calset should be a cal set name, got {raw["calset"]!r}')
+        if 'ifbw' in raw and (not _is_number(raw['ifbw']) or raw['ifbw'] <= 0):
+            raise ValueError(f'ifbw should be a positive number of Hz, got {raw["ifbw"]!r}')
+
+        self.name = name
+        self.F = float(raw['F'])
+        self.Pmin = raw['Pmin']
+        self.Pmax = raw['Pmax']
+        self.Ftest = raw.get('Ftest')
+        self.Ptest = raw.get('Ptest')
+        self.harm = raw.get('harm')
+        # analyzer cal set activated for this device type, None - keep the preset one
+        self.calset = raw.get('calset')
+        # analyzer IF bandwidth in Hz for this device type, None - keep the preset one
+        self.ifbw = raw.get('ifbw')
+
+        for key in ('Istat', 'Idyn'):
+            rows = raw[key]
+            if not isinstance(rows, (list, tuple)) or not rows:
+                raise ValueError(f'{key} should be a list of [span, step, mean] per calibration')
+            try:
+                setattr(self, key, tuple(_triple(r) for r in rows))
+            except ValueError as ex:
+                raise ValueError(f'{key}: {ex}') from None
+
+        # the first calibration decides whether the current is measured at all, as the flow always did
+        self.hasStatic = self.Istat[0] is not None
+        self.hasDynamic = self.Idyn[0] is not None
+        self.checkable = all(k in raw for k in self.check)
+        self.checkFreq = self.Ftest * self.harm * giga if self.checkable else None
+
+    def __getitem__(self, key):
+        # dict-style access for code written against the raw params
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __repr__(self):
+        return f'{self.name}: F={self.F} Pmin={self.Pmin} Pmax={self.Pmax} Istat={self.Istat} Idyn={self.Idyn}'
+
+
+def compile_params(raw):
+    devices = dict()
+    errors = list()
+    if not isinstance(raw, dict):
+        return devices, [f'expected a dict of device types, got {type(raw).__name__}']
+    for name, entry in raw.items():
+        try:
+            devices[name] = DeviceParams(name, entry)
+        except ValueError as ex:
+            errors.append(f'{name}: {ex}')
+    return devices, errors
+
+
+def _compile_file(filename):
+    with open(filename, 'rt', encoding='utf-8') as f:
+        return compile_params(ast.literal_eval(f.read()))
+
+
+class ParamStore:
+    # read-only mapping of device type -> DeviceParams, reloaded in place when params.ini changes
+    record_version = 3
+
+    def __init__(self, filename, defaults=None, poll=2.0):
+        self.filename = filename
+        self.errors = list()
+        self._poll = poll
+        self._lock = threading.Lock()
+        self._listeners = list()
+        self._devices = dict()
+        self._stamp = None
+        self._thread = None
+        self._stop = threading.Event()
+
+        if defaults is not None and not os.path.isfile(filename):
+            self._devices, self.errors = compile_params(defaults)
+        else:
+            self.reload()
+
+    def __getitem__(self, name):
+        return self._devices[name]
+
+    def __contains__(self, name):
+        return name in self._devices
+
+    def __iter__(self):
+        return iter(list(self._devices))
+
+    def __len__(self):
+        return len(self._devices)
+
+    def keys(self):
+        return list(self._devices)
+
+    def items(self):
+        return list(self._devices.items())
+
+    def subscribe(self, callback):
+        # callback(store) runs in the watcher thread after every successful reload
+        self._listeners.append(callback)
+
+    def reload(self):
+        try:
+            stamp = self._file_stamp()
+            devices, errors = compiled_params.load(self.filename, _compile_file, key=self.record_version)
+        except (OSError, SyntaxError, ValueError) as ex:
+            print(f'{self.filename}: not loaded, keeping {len(self._devices)} device types:', ex)
+            return False
+
+        for error in errors:
+            print(f'{self.filename}: skipped', error)
+        with self._lock:
+            self._devices = dict(devices)
+            self.errors = list(errors)
+            self._stamp = stamp
+        print(f'{self.filename}: {len(devices)} device types loaded')
+        for callback in self._listeners:
+            callback(self)
+        return True
+
+    def watch(self):
+        if self._thread is not None or not os.path.isfile(self.filename):
+            return
+        self._stamp = self._stamp or self._file_stamp()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name='param-watch', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _file_stamp(self):
+        st = os.stat(self.filename)
+        return st.st_mtime_ns, st.st_size
+
+    def _watch(self):
+        while not self._stop.wait(self._poll):
+            try:
+                stamp = self._file_stamp()
+            except OSError:
+                continue
+            if stamp != self._stamp:
+                # a half-written file doesn't parse, finishing the write changes the stamp again
+                if not self.reload():
+                    self._stamp = stamp
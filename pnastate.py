@@ -0,0 +1,105 @@
+import hashlib
+import json
+import ntpath
+import os
+import tempfile
+
+
+class PnaStateCache:
+    # configured analyzer states (.csa: instrument state with its cal set) saved on the analyzer once per
+    # device type setup, recalled instead of preset + user preset + measurement setup
+
+    # bump when the setup sequence changes, states saved by an older sequence are rebuilt
+    state_version = 2
+
+    def __init__(self, directory=r'C:\Program Files\Agilent\Network Analyzer\Documents\States',
+                 index='.cache/pnastates.json'):
+        self.directory = directory
+        self._index_path = index
+        self._index = self._read_index()
+        # analyzers the state directory was made on in this process
+        self._directories = set()
+        self.active = None
+        self.stats = {'active': 0, 'recalled': 0, 'built': 0}
+
+    def key(self, *settings):
+        # device types with the same cal set and sweep setup share the state, switching between them needs no recall
+        return hashlib.sha1(repr((self.state_version,) + settings).encode('utf-8')).hexdigest()[:12]
+
+    def restore(self, instrument, addr, key, build):
+        if self.active == key:
+            self.stats['active'] += 1
+            return 'active'
+
+        states = self._index.setdefault(addr, dict())
+        filename = states.get(key)
+        if filename:
+            # the error queue may hold anything from before, only the recall's own errors count
+            instrument.send('*CLS')
+            instrument.send(f'MMEM:LOAD "{ntpath.join(self.directory, filename)}"')
+            instrument.query('*OPC?')
+            error = instrument.query('SYST:ERR?')
+            if self._no_error(error):
+                self.active = key
+                self.stats['recalled'] += 1
+                return 'recalled'
+            print(f'state {filename} recall failed: {error.strip()}, rebuilding')
+            del states[key]
+
+        build()
+        if addr not in self._directories:
+            # an existing directory is an error too, the queue is cleared before the store either way
+            instrument.send(f'MMEM:MDIR "{self.directory}"')
+            instrument.query('*OPC?')
+            self._directories.add(addr)
+        filename = f'qa_{key}.csa'
+        instrument.send('*CLS')
+        instrument.send(f'MMEM:STOR "{ntpath.join(self.directory, filename)}"')
+        instrument.query('*OPC?')
+        error = instrument.query('SYST:ERR?')
+        if self._no_error(error):
+            states[key] = filename
+            self._write_index()
+        else:
+            # the analyzer is set up all the same, only the next init has nothing to recall
+            print(f'state {filename} not saved: {error.strip()}')
+        self.active = key
+        self.stats['built'] += 1
+        return 'built'
+
+    @staticmethod
+    def _no_error(error):
+        return error.strip().lstrip('+').startswith('0')
+
+    def invalidate(self):
+        # something outside the saved state changed the measurement setup
+        self.active = None
+
+    def report(self):
+        print('analyzer state: ' + ', '.join(f'{k} {v}' for k, v in self.stats.items()))
+
+    def _read_index(self):
+        if not self._index_path:
+            return dict()
+        try:
+            with open(self._index_path, 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return dict()
+
+    def _write_index(self):
+        if not self._index_path:
+            return
+        tmp = None
+        try:
+            directory = os.path.dirname(os.path.abspath(self._index_path))
+            os.makedirs(directory, exist_ok=True)
+            # unique per writer, rig pool workers share the index
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self._index_path) + '.', suffix='.tmp')
+            with os.fdopen(fd, 'wt', encoding='utf-8') as f:
+                json.dump(self._index, f, indent=2)
+            os.replace(tmp, self._index_path)
+        except OSError as ex:
+            print('state index write error:', ex)
+            if tmp is not None and os.path.exists(tmp):
+                os.remove(tmp)
@@ -0,0 +1,134 @@
+import atexit
+import math
+import os
+import queue
+import threading
+import time
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def read_results(path):
+    import pyarrow.ipc
+    with pyarrow.ipc.open_stream(path) as reader:
+        return reader.read_all()
+
+
+class ResultSink:
+    # append-only measurement log, Arrow IPC stream: every flushed batch stays readable after a crash
+
+    def __init__(self, directory='results', batch_size=64, flush_interval=5.0):
+        self._directory = directory
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        # exception that stopped the writer thread, raised to the next append and to close
+        self._error = None
+
+        self.path = None
+        self.written = 0
+
+    def append(self, device, secondary, headers, values, phases=None, timestamp=None):
+        self._check()
+        with self._lock:
+            if self._thread is None:
+                self._start()
+        phases = phases or dict()
+        self._queue.put((
+            timestamp or time.time(),
+            str(device),
+            int(secondary),
+            [str(h) for h in headers],
+            [_to_float(v) for v in values],
+            list(phases.keys()),
+            [float(v) for v in phases.values()],
+        ))
+
+    def close(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+        self._check()
+
+    def _check(self):
+        if self._error is not None:
+            raise RuntimeError(f'result log {self.path} writer failed: {self._error!r}') from self._error
+
+    def _start(self):
+        os.makedirs(self._directory, exist_ok=True)
+        # rig pool processes start their sinks in the same second, the name is claimed with an exclusive create
+        base = os.path.join(self._directory, f'results-{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}')
+        n = 0
+        while True:
+            self.path = f'{base}.arrows' if not n else f'{base}-{n}.arrows'
+            try:
+                open(self.path, 'xb').close()
+                break
+            except FileExistsError:
+                n += 1
+        self._thread = threading.Thread(target=self._run, name='result-sink', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _run(self):
+        try:
+            self._write()
+        except Exception as ex:
+            print('result log writer error:', ex)
+            self._error = ex
+
+    def _write(self):
+        try:
+            import pyarrow
+            import pyarrow.ipc
+        except ImportError as ex:
+            print('result log disabled, pyarrow is required:', ex)
+            while self._queue.get() is not None:
+                pass
+            return
+
+        schema = pyarrow.schema([
+            ('timestamp', pyarrow.timestamp('us')),
+            ('device', pyarrow.string()),
+            ('secondary', pyarrow.int32()),
+            ('headers', pyarrow.list_(pyarrow.string())),
+            ('values', pyarrow.list_(pyarrow.float64())),
+            ('phases', pyarrow.list_(pyarrow.string())),
+            ('phase_seconds', pyarrow.list_(pyarrow.float64())),
+        ])
+
+        with pyarrow.OSFile(self.path, 'wb') as sink, pyarrow.ipc.new_stream(sink, schema) as writer:
+            def flush(rows):
+                if not rows:
+                    return
+                columns = list(zip(*rows))
+                columns[0] = [int(t * 1_000_000) for t in columns[0]]
+                writer.write_batch(pyarrow.record_batch([list(c) for c in columns], schema=schema))
+                sink.flush()
+                self.written += len(rows)
+                rows.clear()
+
+            rows = list()
+            deadline = time.monotonic() + self._flush_interval
+            while True:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0.0))
+                except queue.Empty:
+                    item = ()
+                if item is None:
+                    flush(rows)
+                    break
+                if item:
+                    rows.append(item)
+                if len(rows) >= self._batch_size or time.monotonic() >= deadline:
+                    flush(rows)
+                    deadline = time.monotonic() + self._flush_interval
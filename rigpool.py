@@ -0,0 +1,223 @@
+import argparse
+import ast
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from jobqueue import JobResult, MeasureJobQueue, load_jobs, print_stats
+
+
+def load_rigs(filename):
+    # {rig name: {instrument label: VISA address}}
+    with open(filename, 'rt', encoding='utf-8') as f:
+        return ast.literal_eval(f.read())
+
+
+def _rig_worker(name, addrs, jobs, results, swapped, mock_enabled, mock_profile, options):
+    # options: asyncFlow, archive, trace, traceDir, quiet, log - the same as runner's for one rig
+    if options.get('quiet'):
+        sys.stdout = open(options['log'], 'at', encoding='utf-8') if options.get('log') else open(os.devnull, 'wt')
+
+    import instrumentcontroller
+    from tracearchive import TraceArchive
+    instrumentcontroller.mock_enabled = mock_enabled
+    instrumentcontroller.mock_profile = mock_profile
+    # the other rigs' instruments are on the same bus, a rig only takes its own addresses
+    instrumentcontroller.bus_scan = False
+    instrumentcontroller.tracer.enabled = bool(options.get('trace') or options.get('traceDir'))
+
+    controller = instrumentcontroller.InstrumentController(addrs=addrs)
+    # results are collected by the pool into one shared sink
+    controller.resultSink = None
+    # every rig has its own addresses from rigs.ini, the bench address map is not theirs to rewrite
+    controller.addressFile = None
+    controller.asyncFlow = bool(options.get('asyncFlow'))
+    controller.traceDir = options.get('traceDir')
+    if options.get('archive'):
+        # archive files are named per process, the rigs share the directory
+        controller.traceArchive = TraceArchive(options['archive'], points=controller.sweepPoints,
+                                               harmonics=len(controller.harmonics))
+    controller.connect(addrs)
+    if not controller.found:
+        results.put(('error', name, 'instruments not found'))
+        return
+
+    def report(result):
+        result.rig = name
+        results.put(('result', name, result))
+
+    def swap(job):
+        # the operator is on the pool's side, wait for its answer
+        results.put(('swap', name, job))
+        error = swapped.get()
+        if error:
+            raise RuntimeError(f'swap failed: {error}')
+
+    def taken():
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            # the pool reports this job itself if the worker dies with it
+            results.put(('taken', name, job))
+            yield job
+
+    runner = MeasureJobQueue(controller, swap=swap if swapped is not None else None, report=report)
+    try:
+        # stats are printed once by the pool for all rigs
+        runner.run(taken(), stats=False)
+    except Exception as ex:
+        results.put(('error', name, repr(ex)))
+        return
+    finally:
+        controller.disconnect()
+        if controller.traceArchive is not None:
+            controller.traceArchive.close()
+        sys.stdout.flush()
+    results.put(('done', name, None))
+
+
+class RigPool:
+    def __init__(self, rigs, sink=None, swap=None, mock_enabled=False, mock_profile=None, options=None):
+        self._rigs = rigs
+        self._sink = sink
+        # swap(rig, job) blocks while the fixture of that rig is changed, called on a pool thread
+        self._swap = swap
+        self._mock = (mock_enabled, mock_profile)
+        # controller settings every worker applies, see _rig_worker
+        self._options = dict(options or dict())
+        self.results = list()
+        self.elapsed = 0.0
+
+    def run(self, jobs, report=None):
+        # spawn: the stations are Windows hosts, and the workers must not inherit Qt or VISA state
+        ctx = multiprocessing.get_context('spawn')
+        job_queue = ctx.Queue()
+        result_queue = ctx.Queue()
+        for job in jobs:
+            job_queue.put(tuple(job))
+        for _ in self._rigs:
+            job_queue.put(None)
+
+        swapped = {name: ctx.Queue() if self._swap is not None else None for name in self._rigs}
+        workers = {
+            name: ctx.Process(target=_rig_worker, name=f'rig-{name}', daemon=True,
+                              args=(name, addrs, job_queue, result_queue, swapped[name], *self._mock, self._options))
+            for name, addrs in self._rigs.items()
+        }
+
+        self.results.clear()
+        start = time.perf_counter()
+        for w in workers.values():
+            w.start()
+
+        def add(result):
+            self.results.append(result)
+            if self._sink is not None and result.measured:
+                # the same phases column as a single rig writes, not the job step timings
+                self._sink.append(result.device, result.secondary, result.headers, result.data,
+                                  phases=result.phases)
+            if report is not None:
+                report(result)
+
+        def lost(rig, job, error):
+            result = JobResult(*job)
+            result.rig = rig
+            result.error = error
+            add(result)
+
+        # job each rig is running, reported as failed if the rig dies with it
+        taken = dict()
+        running = set(workers)
+        with ThreadPoolExecutor(max_workers=len(workers), thread_name_prefix='rig-swap') as swaps:
+            while running:
+                try:
+                    kind, rig, payload = result_queue.get(timeout=1.0)
+                except queue.Empty:
+                    for name in [n for n in running if not workers[n].is_alive()]:
+                        print(f'rig {name} exited with code {workers[name].exitcode}')
+                        running.discard(name)
+                        if name in taken:
+                            lost(name, taken.pop(name), f'rig exited with code {workers[name].exitcode}')
+                    continue
+                if kind == 'taken':
+                    taken[rig] = payload
+                elif kind == 'swap':
+                    swaps.submit(self._swapped, rig, payload, swapped[rig])
+                elif kind == 'result':
+                    taken.pop(rig, None)
+                    add(payload)
+                else:
+                    running.discard(rig)
+                    if kind == 'error':
+                        print(f'rig {rig} stopped: {payload}')
+                        if rig in taken:
+                            lost(rig, taken.pop(rig), payload)
+
+        for w in workers.values():
+            w.join()
+        # jobs left behind when every rig has stopped
+        while True:
+            try:
+                job = job_queue.get(timeout=0.1)
+            except queue.Empty:
+                break
+            if job is not None:
+                lost(None, job, 'not run, no rig left')
+        self.elapsed = time.perf_counter() - start
+        self.print_stats()
+        return self.results
+
+    def _swapped(self, rig, job, reply):
+        try:
+            self._swap(rig, job)
+        except Exception as ex:
+            reply.put(repr(ex))
+            return
+        reply.put(None)
+
+    def print_stats(self):
+        if not self.results:
+            return
+        print(f'rigs: {len(self._rigs)}')
+        print_stats(self.results, self.elapsed)
+        for rig in self._rigs:
+            done = [r for r in self.results if r.rig == rig]
+            measured = sum(r.measured for r in done)
+            errors = sum(bool(r.error) for r in done)
+            print(f'  {rig}: {len(done)} jobs, {measured} measured, {errors} errors')
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description='run check/measure jobs on several rigs in parallel')
+    parser.add_argument('jobs', help='job file, one <device>;<secondary> per line')
+    parser.add_argument('--rigs', default='rigs.ini')
+    parser.add_argument('--mock', nargs='?', const='instant', default=None,
+                        help='use instrument mocks, optionally with a simulated bus profile')
+    parser.add_argument('--swap', action='store_true', help='wait for Enter before every job on every rig')
+    opts = parser.parse_args(args)
+
+    prompt = threading.Lock()
+
+    def swap(rig, job):
+        # one operator, one question at a time
+        with prompt:
+            input(f'[{rig}] put {job[0]} {job[1]}, press Enter')
+
+    from resultsink import ResultSink
+    sink = ResultSink('results')
+    mock_profile = None if opts.mock in (None, 'instant') else opts.mock
+    pool = RigPool(load_rigs(opts.rigs), sink=sink, swap=swap if opts.swap else None,
+                   mock_enabled=opts.mock is not None, mock_profile=mock_profile)
+    pool.run(load_jobs(opts.jobs))
+    sink.close()
+    print(f'results saved to {sink.path}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
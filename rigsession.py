@@ -0,0 +1,17 @@
+class RigSession:
+    # rig configuration left behind by one flow step (prepare, check) for the next step of the same job,
+    # valid only while nobody else has sent anything to the instruments
+
+    def __init__(self, job, instruments, steps):
+        self.job = tuple(job)
+        # what is already configured: 'pna', 'analyzer', 'generator', 'channels', 'check'
+        self.steps = frozenset(steps)
+        self._instruments = dict(instruments)
+        self._marks = {label: instr.operations for label, instr in instruments.items()}
+
+    def __repr__(self):
+        return f'RigSession({self.job}, {sorted(self.steps)})'
+
+    def touched(self, instruments):
+        return [label for label, instr in instruments.items()
+                if self._instruments.get(label) is not instr or instr.operations != self._marks.get(label)]
@@ -0,0 +1,138 @@
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+import instrumentcontroller
+
+from jobqueue import load_jobs, print_stats
+from resultsink import ResultSink
+from tracearchive import TraceArchive
+
+
+def make_jobs(opts, controller):
+    if opts.jobs:
+        return load_jobs(opts.jobs)
+    devices = list(controller.deviceParams) if opts.all_devices else opts.device
+    return [(d, s) for d in devices for s in opts.secondary]
+
+
+def run_pool(opts, jobs):
+    from rigpool import RigPool, load_rigs
+
+    sink = ResultSink(opts.results)
+    options = {
+        'asyncFlow': opts.async_flow,
+        'archive': opts.archive,
+        'trace': opts.trace,
+        'traceDir': opts.trace_dir,
+        'quiet': opts.quiet,
+        'log': opts.log,
+    }
+    pool = RigPool(load_rigs(opts.rigs), sink=sink, options=options,
+                   mock_enabled=instrumentcontroller.mock_enabled, mock_profile=instrumentcontroller.mock_profile)
+    try:
+        for _ in passes(opts.repeat):
+            pool.run(jobs, report=lambda r: print(r, flush=True))
+    except KeyboardInterrupt:
+        print('interrupted')
+    finally:
+        sink.close()
+    print(f'results saved to {sink.path}')
+
+
+def passes(repeat):
+    n = 0
+    while not repeat or n < repeat:
+        yield n
+        n += 1
+
+
+def run(opts, controller, jobs):
+    # controller chatter goes to the log file or nowhere, one line per job stays on the console
+    console = sys.stdout
+    log = open(opts.log, 'at', encoding='utf-8') if opts.log else open(os.devnull, 'wt')
+    results = list()
+    start = time.perf_counter()
+    try:
+        for n in passes(opts.repeat):
+            def report(result):
+                print(f'pass {n + 1}: {result}', file=console, flush=True)
+
+            with contextlib.redirect_stdout(log if opts.quiet else console):
+                results += controller.runJobs(jobs, report=report)
+    except KeyboardInterrupt:
+        print('interrupted')
+    finally:
+        log.close()
+        if controller.resultSink is not None:
+            controller.resultSink.close()
+        if controller.traceArchive is not None:
+            controller.traceArchive.close()
+
+    print_stats(results, time.perf_counter() - start)
+    if controller.resultSink is not None and controller.resultSink.path:
+        print(f'results saved to {controller.resultSink.path}')
+    if controller.traceArchive is not None and controller.traceArchive.written:
+        print(f'{controller.traceArchive.written} sweeps archived to {controller.traceArchive.path}')
+    return 0 if results else 1
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description='run check/measure cycles without the GUI')
+    parser.add_argument('jobs', nargs='?', help='job file, one <device>;<secondary> per line')
+    parser.add_argument('--device', action='append', default=list(), help='device name, repeatable')
+    parser.add_argument('--all-devices', action='store_true', help='every device from params.ini')
+    parser.add_argument('--secondary', action='append', type=int, help='secondary params index, repeatable')
+    parser.add_argument('--repeat', type=int, default=1, help='passes over the job list, 0 - until interrupted')
+    parser.add_argument('--mock', nargs='?', const='instant', default=None,
+                        help='use instrument mocks, optionally with a simulated bus profile')
+    parser.add_argument('--rigs', help='rigs file, run the jobs on every rig in parallel')
+    parser.add_argument('--async', dest='async_flow', action='store_true', help='drive instruments concurrently')
+    parser.add_argument('--results', default='results', help='result log directory')
+    parser.add_argument('--archive', help='archive raw traces to this directory, adds trace reads in loop mode')
+    parser.add_argument('--trace', action='store_true', help='trace bus operations, print a summary per cycle')
+    parser.add_argument('--trace-dir', help='save Chrome traces of every check/measure, implies --trace')
+    parser.add_argument('--quiet', action='store_true', help='only job lines and stats on the console')
+    parser.add_argument('--log', help='append controller output to this file, with --quiet')
+    opts = parser.parse_args(args)
+    opts.secondary = opts.secondary or [0]
+
+    instrumentcontroller.mock_enabled = opts.mock is not None
+    instrumentcontroller.mock_profile = None if opts.mock in (None, 'instant') else opts.mock
+
+    if opts.rigs:
+        if not opts.jobs:
+            parser.error('--rigs needs a job file')
+        run_pool(opts, load_jobs(opts.jobs))
+        return 0
+
+    controller = instrumentcontroller.InstrumentController()
+    controller.asyncFlow = opts.async_flow
+    controller.traceDir = opts.trace_dir
+    instrumentcontroller.tracer.enabled = opts.trace or bool(opts.trace_dir)
+    controller.resultSink = ResultSink(opts.results)
+    controller.traceArchive = TraceArchive(opts.archive, points=controller.sweepPoints,
+                                           harmonics=len(controller.harmonics)) if opts.archive else None
+
+    jobs = make_jobs(opts, controller)
+    if not jobs:
+        parser.error('no jobs: pass a job file, --device or --all-devices')
+    unknown = sorted({d for d, _ in jobs} - set(controller.deviceParams))
+    if unknown:
+        parser.error(f'unknown devices: {", ".join(unknown)}')
+
+    controller.connect({k: v.addr for k, v in controller.requiredInstruments.items()})
+    if not controller.found:
+        print('instruments not found')
+        return 2
+
+    try:
+        return run(opts, controller, jobs)
+    finally:
+        controller.disconnect()
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,76 @@
+from contextlib import contextmanager
+
+
+class BatchedInstrument:
+    # keep compound messages well under the instruments' input buffer size
+    max_length = 1024
+
+    def __init__(self, instrument):
+        self._instrument = instrument
+        self._queue = list()
+        self._depth = 0
+
+        self.queued = 0
+        self.transactions = 0
+
+    def __repr__(self):
+        return repr(self._instrument)
+
+    def __getattr__(self, item):
+        attr = getattr(self._instrument, item)
+        if not callable(attr):
+            return attr
+
+        # driver helpers (set_pow, set_output, ...) write to the bus themselves, keep command order
+        def call(*args, **kwargs):
+            self.flush()
+            return attr(*args, **kwargs)
+        return call
+
+    @property
+    def saved(self):
+        return self.queued - self.transactions
+
+    @contextmanager
+    def batch(self):
+        self._depth += 1
+        try:
+            yield self
+        finally:
+            self._depth -= 1
+            if not self._depth:
+                self.flush()
+
+    def send(self, command):
+        if not self._depth:
+            return self._instrument.send(command)
+        self._queue.append(command)
+        self.queued += 1
+
+    def query(self, question):
+        self.flush()
+        return self._instrument.query(question)
+
+    def flush(self):
+        if not self._queue:
+            return
+        for message in self._compound(self._queue):
+            self._instrument.send(message)
+            self.transactions += 1
+        self._queue.clear()
+
+    def reset_stats(self):
+        self.queued = 0
+        self.transactions = 0
+
+    def _compound(self, commands):
+        message = ''
+        for command in commands:
+            # headers in a compound message are relative to the previous one unless rooted with ':'
+            command = command if command[0] in ':*' else f':{command}'
+            if message and len(message) + len(command) + 1 > self.max_length:
+                yield message
+                message = ''
+            message = f'{message};{command}' if message else command
+        if message:
+            yield message
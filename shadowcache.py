@@ -0,0 +1,93 @@
+class ShadowedInstrument:
+    # settings worth remembering: frequency, power, output state, sweep points, trigger setup
+    cached = ('FREQ', 'POW', 'OUTP', 'SWE', 'LIST', 'TRIG', 'INIT:CONT', 'CONT:SIGN', 'FORM',
+              'SENS1:FREQ', 'SENS1:FOM', 'SENS1:SWE', 'SENS1:BWID', 'CALC1:SMO', 'CALC1:FORM',
+              # harmonic channels
+              'SENS2:FOM', 'SENS2:SWE', 'SENS2:BWID', 'SENS3:FOM', 'SENS3:SWE', 'SENS3:BWID',
+              'SENS4:FOM', 'SENS4:SWE', 'SENS4:BWID')
+    # commands that reset the instrument state wholesale
+    resetting = ('*RST', '*RCL', 'SYST:PRES', 'SYST:UPR', 'MMEM:LOAD')
+    # measurement-scoped settings are lost when measurements are redefined
+    invalidating = {
+        'CALC:PAR:DEL': 'CALC',
+        'CALC1:PAR:DEL': 'CALC',
+        # CALC1 settings apply to the selected measurement
+        'CALC1:PAR:DEF': 'CALC1',
+        'CALC1:PAR:SEL': 'CALC1',
+    }
+    # driver helpers and SCPI subsystems they write to
+    helpers = {
+        'set_freq': 'FREQ',
+        'set_pow': 'POW',
+        'set_output': 'OUTP',
+        'set_modulation': 'OUTP:MOD',
+        'set_current': 'CURR',
+        'set_voltage': 'VOLT',
+    }
+
+    def __init__(self, instrument):
+        self._instrument = instrument
+        self._shadow = dict()
+        self.skipped = 0
+        # every request made through the wrapper, lets a flow step tell whether someone else used the instrument
+        self.operations = 0
+
+    def __repr__(self):
+        return repr(self._instrument)
+
+    def __getattr__(self, item):
+        attr = getattr(self._instrument, item)
+        if item not in self.helpers or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self.operations += 1
+            key = (item, kwargs.get('chan'))
+            value = (args, tuple(sorted(kwargs.items())))
+            if self._shadow.get(key) == value:
+                self.skipped += 1
+                return
+            result = attr(*args, **kwargs)
+            self.invalidate(self.helpers[item])
+            self._shadow[key] = value
+            return result
+        return call
+
+    def invalidate(self, prefix=None):
+        if prefix is None:
+            self._shadow.clear()
+            return
+        for key in [k for k in self._shadow if self._subsystem(k).startswith(prefix)]:
+            del self._shadow[key]
+
+    def send(self, command):
+        self.operations += 1
+        header, _, value = command.strip().lstrip(':').partition(' ')
+        header = header.upper()
+
+        if header.startswith(self.resetting):
+            self.invalidate()
+            return self._instrument.send(command)
+        for h, prefix in self.invalidating.items():
+            if header.startswith(h):
+                self.invalidate(prefix)
+
+        if not header.startswith(self.cached) or header.endswith('?'):
+            return self._instrument.send(command)
+
+        if self._shadow.get(header) == value:
+            self.skipped += 1
+            return
+        result = self._instrument.send(command)
+        self._shadow[header] = value
+        # raw writes make the matching helper shadows unreliable
+        for key in [k for k in self._shadow if isinstance(k, tuple) and header.startswith(self.helpers[k[0]])]:
+            del self._shadow[key]
+        return result
+
+    def query(self, question):
+        self.operations += 1
+        return self._instrument.query(question)
+
+    def _subsystem(self, key):
+        return self.helpers[key[0]] if isinstance(key, tuple) else key
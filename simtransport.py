@@ -0,0 +1,145 @@
+import re
+import time
+
+import numpy
+
+from tracedata import make_block
+
+
+class LatencyProfile:
+    def __init__(self, write=0.0, query=0.0, bandwidth=0, point_time=0.0, settle=None):
+        # per message bus turnaround, seconds
+        self.write = write
+        self.query = query
+        # payload throughput, bytes per second, 0 - unlimited
+        self.bandwidth = bandwidth
+        # triggered sweep time per point, seconds
+        self.point_time = point_time
+        # header -> time the instrument stays busy after the command, seconds
+        self.settle = settle or dict()
+
+    def transfer_time(self, size):
+        return size / self.bandwidth if self.bandwidth else 0.0
+
+
+profiles = {
+    'instant': LatencyProfile(),
+    'gpib': LatencyProfile(write=0.003, query=0.006, bandwidth=400_000, point_time=0.0008,
+                           settle={'SYST:PRES': 1.2, 'SYST:UPR': 1.5, 'MMEM:LOAD': 1.0, '*RST': 0.5}),
+    'lan': LatencyProfile(write=0.0005, query=0.001, bandwidth=5_000_000, point_time=0.0008,
+                          settle={'SYST:PRES': 1.2, 'SYST:UPR': 1.5, 'MMEM:LOAD': 1.0, '*RST': 0.5}),
+}
+
+_units = {'HZ': 1, 'KHZ': 1e3, 'MHZ': 1e6, 'GHZ': 1e9}
+
+
+def parse_freq(value, default):
+    m = re.fullmatch(r'\s*([-+0-9.eE]+)\s*([a-zA-Z]*)\s*', value or '')
+    if not m:
+        return default
+    return float(m.group(1)) * _units.get(m.group(2).upper(), 1)
+
+
+class SimulatedTransport:
+    # timing model of a VISA resource around a mock instrument, answers trace queries with synthetic sweeps
+
+    def __init__(self, mock, profile='gpib', seed=None, level=-15.0):
+        self._mock = mock
+        self.profile = profiles[profile] if isinstance(profile, str) else profile
+        self.timeout = 2000
+
+        self._rng = numpy.random.default_rng(seed)
+        self._level = level
+        self._state = dict()
+        self._busy_until = 0.0
+        self._buffer = b''
+
+    def write(self, command):
+        self._sleep(self.profile.write + self.profile.transfer_time(len(command) + 1))
+        for cmd in command.split(';'):
+            self._apply(cmd.strip().lstrip(':'))
+            if '?' in cmd:
+                answer = self._answer(cmd.strip().lstrip(':'), binary=True)
+                self._buffer += (answer.encode() if isinstance(answer, str) else answer) + b';'
+        if self._buffer.endswith(b';'):
+            self._buffer = self._buffer[:-1] + b'\n'
+        return self._mock.write(command)
+
+    def query(self, question):
+        self._sleep(self.profile.query + self.profile.transfer_time(len(question) + 1))
+        answer = self._answer(question.strip().lstrip(':'), binary=False)
+        self._sleep(self.profile.transfer_time(len(answer)))
+        return answer.decode() if isinstance(answer, bytes) else answer
+
+    def read_bytes(self, count):
+        chunk, self._buffer = self._buffer[:count], self._buffer[count:]
+        self._sleep(self.profile.transfer_time(len(chunk)))
+        return chunk
+
+    def read_stb(self):
+        self._sleep(self.profile.query)
+        return 0x20 if time.perf_counter() >= self._busy_until else 0
+
+    def wait_for_srq(self, timeout=25000):
+        remaining = self._busy_until - time.perf_counter()
+        if remaining > timeout / 1000:
+            time.sleep(timeout / 1000)
+            raise TimeoutError('SRQ timeout')
+        self._sleep(remaining)
+
+    def close(self):
+        pass
+
+    @property
+    def points(self):
+        return self._points(1)
+
+    def _points(self, channel):
+        return int(self._state.get(f'SENS{channel}:SWE:POIN') or self._state.get('SWE:POIN') or 301)
+
+    def _apply(self, cmd):
+        header, _, value = cmd.partition(' ')
+        header = header.upper()
+        if header.endswith('?'):
+            return
+        self._state[header] = value
+        if header == 'INIT':
+            self._busy(self.points * self.profile.point_time)
+        if header in self.profile.settle:
+            self._busy(self.profile.settle[header])
+
+    def _busy(self, duration):
+        self._busy_until = max(self._busy_until, time.perf_counter()) + duration
+
+    def _answer(self, question, binary):
+        header = question.partition(' ')[0].upper()
+        if header == '*OPC?':
+            remaining = self._busy_until - time.perf_counter()
+            if remaining > self.timeout / 1000:
+                time.sleep(self.timeout / 1000)
+                raise TimeoutError('*OPC? timeout')
+            self._sleep(remaining)
+            return '1'
+        if (header.startswith('SENS') and header.endswith(':X?')) or \
+                (header.startswith('CALC') and header.endswith(':DATA?')):
+            channel = int(re.match(r'[A-Z]+(\d*)', header).group(1) or 1)
+            values = self._freqs(channel) if header.startswith('SENS') else self._trace(channel)
+            binary = binary and self._state.get('FORM:DATA', 'ASCII').upper().startswith('REAL')
+            return make_block(values) if binary else ','.join(f'{v:.6e}' for v in values).encode()
+        return self._mock.query(question)
+
+    def _freqs(self, channel=1):
+        start = parse_freq(self._state.get(f'SENS{channel}:FOM:RANG1:FREQ:STAR'), 0.1e9)
+        stop = parse_freq(self._state.get(f'SENS{channel}:FOM:RANG1:FREQ:STOP'), 40e9)
+        harmonic = float(self._state.get(f'SENS{channel}:FOM:RANG3:FREQ:MULT') or 1)
+        return numpy.linspace(start, stop, self._points(channel)) * harmonic
+
+    def _trace(self, channel=1):
+        freqs = self._freqs(channel)
+        rolloff = -10 * freqs / max(freqs[-1], 1.0)
+        return self._level + rolloff + self._rng.normal(0, 0.3, len(freqs))
+
+    @staticmethod
+    def _sleep(duration):
+        if duration > 0:
+            time.sleep(duration)
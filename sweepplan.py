@@ -0,0 +1,90 @@
+import math
+
+import numpy
+
+giga = 1_000_000_000
+
+
+class SweepPlan:
+    # one device type's sweeps: source range per harmonic in GHz, shared point count and IF bandwidth,
+    # the receiver sits at harmonic x source. ifbw None leaves the preset IF bandwidth alone
+
+    def __init__(self, name, spans, points, ifbw, smooth, check=None, fine_ifbw=None, refine_margin=None):
+        self.name = name
+        self.spans = spans
+        self.points = points
+        self.ifbw = ifbw
+        self.smooth = smooth
+        # narrow source range around Ftest for the fine check sweep, None - no refinement
+        self.check = check
+        self.fine_ifbw = fine_ifbw
+        self.refine_margin = refine_margin
+
+    def __repr__(self):
+        spans = ', '.join(f'{h}: {start:.3g}-{stop:.3g}' for h, (start, stop) in self.spans.items())
+        ifbw = f'IFBW {self.ifbw} Hz' if self.ifbw is not None else 'preset IFBW'
+        return f'sweep plan for {self.name}: {self.points} points, {ifbw}, GHz {spans}'
+
+    def settings(self):
+        # what the analyzer is set up with, the device type name and the check span are not part of it
+        return self.points, self.ifbw, self.smooth, tuple(sorted(self.spans.items()))
+
+    def span(self, harmonic):
+        return self.spans[harmonic]
+
+    def axis(self, harmonic):
+        start, stop = self.spans[harmonic]
+        return numpy.linspace(start, stop, self.points) * harmonic * giga
+
+    def refine(self, Pread, Ptest):
+        # a coarse reading close to the limit is repeated on a narrow span with a narrow IF bandwidth
+        return self.check is not None and abs(Pread - Ptest) < self.refine_margin
+
+
+class SweepPlanner:
+    # derives sweep ranges and point count from F, Ftest and harm in params.ini, the IF bandwidth is
+    # the device type's ifbw if it has one. sweep time scales with points / IFBW and most device types
+    # only need a narrow band
+
+    def __init__(self, limits, harmonics, margin=0.2, step=0.01, min_points=51, max_points=301,
+                 smooth=0.1, refine=True, check_span=0.02, fine_ifbw=1_000, refine_margin=3.0):
+        # analyzer receiver limits per harmonic, source GHz
+        self.limits = limits
+        self.harmonics = harmonics
+        self.margin = margin
+        self.step = step
+        self.min_points = min_points
+        self.max_points = max_points
+        self.smooth = smooth
+        self.refine = refine
+        self.check_span = check_span
+        self.fine_ifbw = fine_ifbw
+        self.refine_margin = refine_margin
+
+    def band(self, param):
+        # source frequencies the device is specified at, with a margin on both sides
+        freqs = [param.F] + ([param.Ftest] if param.Ftest is not None else [])
+        return min(freqs) * (1 - self.margin), max(freqs) * (1 + self.margin)
+
+    def plan(self, param):
+        band = self.band(param)
+        spans = {h: self._clip(band, self.limits[h]) for h in self.harmonics}
+
+        widest = max(stop - start for start, stop in spans.values())
+        points = min(max(math.ceil(widest / self.step) + 1, self.min_points), self.max_points)
+        smooth = max(3, round(points * self.smooth))
+
+        check = None
+        if self.refine and param.checkable:
+            check = self._clip((param.Ftest * (1 - self.check_span), param.Ftest * (1 + self.check_span)),
+                               self.limits[param.harm])
+        return SweepPlan(param.name, spans, points, param.ifbw, smooth,
+                         check=check, fine_ifbw=self.fine_ifbw, refine_margin=self.refine_margin)
+
+    @staticmethod
+    def _clip(band, limits):
+        start, stop = max(band[0], limits[0]), min(band[1], limits[1])
+        # a band outside the receiver range of this harmonic gets the whole range, as before planning
+        if start >= stop:
+            return tuple(limits)
+        return round(start, 6), round(stop, 6)
@@ -0,0 +1,81 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+
+def file_digest(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class CompiledFileCache:
+    # compiled form of a source file keyed by path, mtime/size and content hash
+    # stamp check is a single stat, content hash is computed only when the stamp changes
+
+    def __init__(self, cache_dir='.cache', prefix='table'):
+        self._dir = cache_dir
+        self._prefix = prefix
+        self._memory = dict()
+
+    def load(self, filename, compile_fn, key=None, complete=None):
+        # complete(table) -> False: the compile partly failed, the result is used once and not cached
+        path = os.path.abspath(filename)
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        entry = self._memory.get(path)
+        if entry and entry['stamp'] == stamp and entry['key'] == key:
+            return entry['table']
+
+        entry = self._read(path)
+        if not entry or entry['key'] != key:
+            entry = None
+        elif entry['stamp'] != stamp:
+            digest = file_digest(path)
+            entry = entry if entry['digest'] == digest else None
+            if entry:
+                # touched but not changed
+                entry['stamp'] = stamp
+                self._write(path, entry)
+
+        if entry is None:
+            table = compile_fn(filename)
+            if complete is not None and not complete(table):
+                print(f'{filename}: compiled with errors, not cached')
+                return table
+            entry = {'stamp': stamp, 'digest': file_digest(path), 'key': key, 'table': table}
+            self._write(path, entry)
+
+        self._memory[path] = entry
+        return entry['table']
+
+    def _cache_path(self, path):
+        name = hashlib.sha1(path.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self._dir, f'{self._prefix}-{name}.pickle')
+
+    def _read(self, path):
+        try:
+            with open(self._cache_path(path), 'rb') as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        return entry if entry.get('path') == path else None
+
+    def _write(self, path, entry):
+        tmp = None
+        try:
+            os.makedirs(self._dir, exist_ok=True)
+            cache_path = self._cache_path(path)
+            # unique per writer, rig pool workers share the cache directory
+            fd, tmp = tempfile.mkstemp(dir=self._dir, prefix=os.path.basename(cache_path) + '.', suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(dict(entry, path=path), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, cache_path)
+        except OSError as ex:
+            print('cache write error:', ex)
+            if tmp is not None and os.path.exists(tmp):
+                os.remove(tmp)
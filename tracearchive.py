@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+
+import numpy
+
+from numpy.lib.format import open_memmap
+
+
+def record_dtype(points, harmonics, levels):
+    return numpy.dtype([
+        ('timestamp', '<f8'),
+        ('device', 'S96'),
+        ('secondary', '<i4'),
+        ('check_freq', '<f8', (points,)),
+        ('check_amp', '<f4', (points,)),
+        ('freq', '<f8', (harmonics, points)),
+        ('amp', '<f4', (levels, harmonics, points)),
+    ])
+
+
+def filled(records):
+    # records are written in order, unused preallocated ones have a zero timestamp
+    return records[:int(numpy.count_nonzero(records['timestamp'] > 0))]
+
+
+def open_archive(path):
+    return filled(numpy.load(path, mmap_mode='r'))
+
+
+def dut_records(records, device, secondary=None):
+    # views into the mapped file, nothing is copied until a field is used
+    match = records['device'] == device.encode('utf-8')
+    if secondary is not None:
+        match &= records['secondary'] == secondary
+    return [records[i] for i in numpy.flatnonzero(match)]
+
+
+class TraceArchive:
+    # every sweep of every DUT in preallocated fixed-size records of memory-mapped .npy files,
+    # a full file is closed and the next one started, ~23 kB per record at 301 points
+
+    levels = ('power sweep', 'frequency sweep')
+
+    def __init__(self, directory='archive', points=301, harmonics=4, capacity=256):
+        self._directory = directory
+        self._capacity = capacity
+        self.points = points
+        self.harmonics = harmonics
+        self.dtype = record_dtype(points, harmonics, len(self.levels))
+        self._lock = threading.Lock()
+        self._records = None
+        self._next = 0
+
+        self.path = None
+        self.written = 0
+
+    def append(self, device, secondary, check=None, axes=None, traces=None, timestamp=None):
+        with self._lock:
+            if self._records is None or self._next == len(self._records):
+                self._open()
+            i = self._next
+            r = self._records
+            r['device'][i] = str(device).encode('utf-8')[:96]
+            r['secondary'][i] = secondary
+            # sweeps not taken stay NaN
+            for field in ('check_freq', 'check_amp', 'freq', 'amp'):
+                r[field][i] = numpy.nan
+            if check is not None:
+                self._put(r['check_freq'][i], check[0])
+                self._put(r['check_amp'][i], check[1])
+            for h, axis in (axes or dict()).items():
+                self._put(r['freq'][i, h - 1], axis)
+            for level, harmonics in (traces or dict()).items():
+                for h, amps in harmonics.items():
+                    self._put(r['amp'][i, self.levels.index(level), h - 1], amps)
+            # written last, a record with a timestamp is complete
+            r['timestamp'][i] = timestamp or time.time()
+            self._next += 1
+            self.written += 1
+            return self.path, i
+
+    def flush(self):
+        with self._lock:
+            if self._records is not None:
+                self._records.flush()
+
+    def close(self):
+        with self._lock:
+            if self._records is not None:
+                self._records.flush()
+                self._records = None
+
+    def _put(self, target, values):
+        values = numpy.asarray(values)
+        n = min(len(values), len(target))
+        target[:n] = values[:n]
+        target[n:] = numpy.nan
+
+    def _open(self):
+        if self._records is not None:
+            self._records.flush()
+        os.makedirs(self._directory, exist_ok=True)
+        self.path = os.path.join(self._directory, f'traces-{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}.npy')
+        # the whole file is allocated up front, not sparse on NTFS, hence the small files
+        self._records = open_memmap(self.path, mode='w+', dtype=self.dtype, shape=(self._capacity,))
+        self._next = 0
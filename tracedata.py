@@ -0,0 +1,61 @@
+import numpy
+
+# IEEE 488.2 definite-length block: #<n><length, n digits><payload>
+# payload is FORM:DATA REAL,64 with FORM:BORD NORM (big endian doubles)
+block_dtype = numpy.dtype('>f8')
+
+
+def parse_ascii(text):
+    return numpy.array(text.split(','), dtype=numpy.float64)
+
+
+def parse_block(raw, offset=0):
+    start = raw.index(b'#', offset)
+    digits = int(raw[start + 1:start + 2])
+    if digits == 0:
+        raise ValueError('indefinite-length blocks are not supported')
+    length = int(raw[start + 2:start + 2 + digits])
+    begin = start + 2 + digits
+    values = numpy.frombuffer(raw, dtype=block_dtype, count=length // block_dtype.itemsize, offset=begin)
+    return values, begin + length
+
+
+def parse_blocks(raw):
+    blocks = list()
+    offset = 0
+    while raw.find(b'#', offset) != -1:
+        values, offset = parse_block(raw, offset)
+        blocks.append(values)
+    return blocks
+
+
+def make_block(values):
+    payload = numpy.asarray(values, dtype=block_dtype).tobytes()
+    length = str(len(payload)).encode()
+    return b'#' + str(len(length)).encode() + length + payload
+
+
+def read_block(transport):
+    # read by exact length, binary payload may contain termination characters
+    header = transport.read_bytes(2)
+    digits = int(header[1:2])
+    length = int(transport.read_bytes(digits))
+    values = numpy.frombuffer(transport.read_bytes(length), dtype=block_dtype)
+    # skip response separator: ';' between compound responses or the final '\n'
+    transport.read_bytes(1)
+    return values
+
+
+def read_blocks(transport, count):
+    return [read_block(transport) for _ in range(count)]
+
+
+def nearest_index(freqs, target):
+    if len(freqs) < 2 or freqs[0] > freqs[-1]:
+        return int(numpy.abs(freqs - target).argmin())
+    idx = int(numpy.searchsorted(freqs, target))
+    if idx == 0:
+        return 0
+    if idx == len(freqs):
+        return idx - 1
+    return idx if freqs[idx] - target < target - freqs[idx - 1] else idx - 1
@@ -0,0 +1,125 @@
+import json
+import os
+import threading
+import time
+
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class Tracer:
+    def __init__(self, enabled=False):
+        # flow phases are always timed, a few events per cycle for the result log,
+        # bus operations, the summary table and Chrome export only when enabled
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._lanes = dict()
+        self._open = dict()
+        self.events = list()
+
+    def clear(self):
+        with self._lock:
+            self.events.clear()
+            self._open.clear()
+
+    def record(self, name, cat, lane, start, duration, args=None):
+        if not self.enabled and cat != 'phase':
+            return
+        with self._lock:
+            tid = self._lanes.setdefault(lane, len(self._lanes) + 1)
+            self.events.append((name, cat, tid, start - self._origin, duration, args))
+
+    def phase(self, name, lane='flow'):
+        # sequential phases without nesting the code: starting a phase closes the previous one in the lane
+        now = time.perf_counter()
+        with self._lock:
+            current = self._open.pop(lane, None)
+            if name:
+                self._open[lane] = (name, now)
+        if current:
+            self.record(current[0], 'phase', lane, current[1], now - current[1])
+
+    @contextmanager
+    def span(self, name, cat='phase', lane='flow', **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, cat, lane, start, time.perf_counter() - start, args or None)
+
+    def phase_totals(self, lane='flow'):
+        totals = dict()
+        with self._lock:
+            tid = self._lanes.get(lane)
+            for name, cat, event_tid, _, duration, _ in self.events:
+                if cat == 'phase' and event_tid == tid:
+                    totals[name] = totals.get(name, 0.0) + duration
+        return totals
+
+    def export_chrome(self, path):
+        with self._lock:
+            events = list(self.events)
+            lanes = dict(self._lanes)
+        trace = [{'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid, 'args': {'name': lane}}
+                 for lane, tid in lanes.items()]
+        for name, cat, tid, start, duration, args in events:
+            event = {'name': name, 'cat': cat, 'ph': 'X', 'pid': 1, 'tid': tid,
+                     'ts': round(start * 1e6, 3), 'dur': round(duration * 1e6, 3)}
+            if args:
+                event['args'] = args
+            trace.append(event)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'wt', encoding='utf-8') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+
+    def summary(self):
+        stats = defaultdict(list)
+        with self._lock:
+            for name, cat, _, _, duration, _ in self.events:
+                stats[(cat, name)].append(duration)
+        lines = [f'{"category":<18} {"name":<32} {"count":>6} {"total ms":>10} {"mean ms":>9} {"max ms":>9}']
+        for (cat, name), values in sorted(stats.items(), key=lambda i: -sum(i[1])):
+            lines.append(f'{cat:<18} {name:<32} {len(values):>6} {sum(values) * 1000:>10.1f} '
+                         f'{sum(values) / len(values) * 1000:>9.2f} {max(values) * 1000:>9.2f}')
+        return '\n'.join(lines)
+
+
+class TracedTransport:
+    # times every bus operation of a VISA resource (or mock) in its own trace lane
+
+    traced = ('write', 'query', 'read_bytes', 'read_stb', 'wait_for_srq')
+
+    def __init__(self, transport, tracer, lane):
+        object.__setattr__(self, '_transport', transport)
+        object.__setattr__(self, '_tracer', tracer)
+        object.__setattr__(self, '_lane', lane)
+
+    def __getattr__(self, item):
+        attr = getattr(self._transport, item)
+        if item not in self.traced:
+            return attr
+
+        def call(*args, **kwargs):
+            if not self._tracer.enabled:
+                return attr(*args, **kwargs)
+            if args and item in ('write', 'query'):
+                span = self._tracer.span(str(args[0]).partition(' ')[0], cat=item, lane=self._lane, cmd=str(args[0]))
+            else:
+                span = self._tracer.span(item, cat=item, lane=self._lane)
+            with span:
+                return attr(*args, **kwargs)
+        return call
+
+    def __setattr__(self, key, value):
+        setattr(self._transport, key, value)
+
+    def __repr__(self):
+        return repr(self._transport)
+
+
+tracer = Tracer()
+
+
+def traced(transport, lane):
+    return TracedTransport(transport, tracer, lane)
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'connectionwidget.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.11
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+class Ui_widgetInstrumentController(object):
+    def setupUi(self, widgetInstrumentController):
+        widgetInstrumentController.setObjectName("widgetInstrumentController")
+        widgetInstrumentController.resize(153, 54)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Minimum)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(widgetInstrumentController.sizePolicy().hasHeightForWidth())
+        widgetInstrumentController.setSizePolicy(sizePolicy)
+        widgetInstrumentController.setWindowTitle("")
+        self.verticalLayout = QtWidgets.QVBoxLayout(widgetInstrumentController)
+        self.verticalLayout.setSizeConstraint(QtWidgets.QLayout.SetMinimumSize)
+        self.verticalLayout.setContentsMargins(-1, 2, -1, 2)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.grpInstruments = QtWidgets.QGroupBox(widgetInstrumentController)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Minimum)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.grpInstruments.sizePolicy().hasHeightForWidth())
+        self.grpInstruments.setSizePolicy(sizePolicy)
+        self.grpInstruments.setObjectName("grpInstruments")
+        self.layInstruments = QtWidgets.QVBoxLayout(self.grpInstruments)
+        self.layInstruments.setSizeConstraint(QtWidgets.QLayout.SetMinimumSize)
+        self.layInstruments.setContentsMargins(5, 5, 5, 5)
+        self.layInstruments.setSpacing(5)
+        self.layInstruments.setObjectName("layInstruments")
+        self.horizontalLayout = QtWidgets.QHBoxLayout()
+        self.horizontalLayout.setSizeConstraint(QtWidgets.QLayout.SetMinimumSize)
+        self.horizontalLayout.setObjectName("horizontalLayout")
+        spacerItem = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.horizontalLayout.addItem(spacerItem)
+        self.btnConnect = QtWidgets.QPushButton(self.grpInstruments)
+        self.btnConnect.setObjectName("btnConnect")
+        self.horizontalLayout.addWidget(self.btnConnect)
+        self.layInstruments.addLayout(self.horizontalLayout)
+        self.verticalLayout.addWidget(self.grpInstruments)
+
+        self.retranslateUi(widgetInstrumentController)
+        QtCore.QMetaObject.connectSlotsByName(widgetInstrumentController)
+
+    def retranslateUi(self, widgetInstrumentController):
+        _translate = QtCore.QCoreApplication.translate
+        self.grpInstruments.setTitle(_translate("widgetInstrumentController", "Инструменты"))
+        self.btnConnect.setText(_translate("widgetInstrumentController", "Подключить"))
+
+
+source_digest = '7345b1ea105b5bff20b03661491f6e8f262a7ded'
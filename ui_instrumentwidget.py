@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'instrumentwidget.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.11
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+class Ui_widgetInstrument(object):
+    def setupUi(self, widgetInstrument):
+        widgetInstrument.setObjectName("widgetInstrument")
+        widgetInstrument.resize(166, 56)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Minimum)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(widgetInstrument.sizePolicy().hasHeightForWidth())
+        widgetInstrument.setSizePolicy(sizePolicy)
+        widgetInstrument.setWindowTitle("")
+        self.verticalLayout = QtWidgets.QVBoxLayout(widgetInstrument)
+        self.verticalLayout.setSizeConstraint(QtWidgets.QLayout.SetMinimumSize)
+        self.verticalLayout.setContentsMargins(2, 2, 2, -1)
+        self.verticalLayout.setSpacing(2)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.horizontalLayout = QtWidgets.QHBoxLayout()
+        self.horizontalLayout.setSizeConstraint(QtWidgets.QLayout.SetMinimumSize)
+        self.horizontalLayout.setObjectName("horizontalLayout")
+        self.label = QtWidgets.QLabel(widgetInstrument)
+        self.label.setObjectName("label")
+        self.horizontalLayout.addWidget(self.label)
+        self.editAddress = QtWidgets.QLineEdit(widgetInstrument)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.MinimumExpanding, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.editAddress.sizePolicy().hasHeightForWidth())
+        self.editAddress.setSizePolicy(sizePolicy)
+        self.editAddress.setMinimumSize(QtCore.QSize(120, 0))
+        self.editAddress.setObjectName("editAddress")
+        self.horizontalLayout.addWidget(self.editAddress)
+        self.verticalLayout.addLayout(self.horizontalLayout)
+        self.editStatus = QtWidgets.QLineEdit(widgetInstrument)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.MinimumExpanding, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.editStatus.sizePolicy().hasHeightForWidth())
+        self.editStatus.setSizePolicy(sizePolicy)
+        self.editStatus.setMinimumSize(QtCore.QSize(150, 0))
+        self.editStatus.setText("")
+        self.editStatus.setObjectName("editStatus")
+        self.verticalLayout.addWidget(self.editStatus)
+
+        self.retranslateUi(widgetInstrument)
+        QtCore.QMetaObject.connectSlotsByName(widgetInstrument)
+
+    def retranslateUi(self, widgetInstrument):
+        _translate = QtCore.QCoreApplication.translate
+        self.label.setText(_translate("widgetInstrument", "stub"))
+        self.editAddress.setPlaceholderText(_translate("widgetInstrument", "адрес..."))
+        self.editStatus.setPlaceholderText(_translate("widgetInstrument", "статус..."))
+
+
+source_digest = 'e40ab29fe33f3f339f6a5c2e42b1f17a85d6aedc'
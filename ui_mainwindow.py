@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'mainwindow.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.11
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+class Ui_MainWindow(object):
+    def setupUi(self, MainWindow):
+        MainWindow.setObjectName("MainWindow")
+        MainWindow.resize(1132, 525)
+        self.centralwidget = QtWidgets.QWidget(MainWindow)
+        self.centralwidget.setObjectName("centralwidget")
+        self.horizontalLayout = QtWidgets.QHBoxLayout(self.centralwidget)
+        self.horizontalLayout.setSizeConstraint(QtWidgets.QLayout.SetMinimumSize)
+        self.horizontalLayout.setContentsMargins(0, 8, 8, 8)
+        self.horizontalLayout.setSpacing(5)
+        self.horizontalLayout.setObjectName("horizontalLayout")
+        self.layInstrs = QtWidgets.QVBoxLayout()
+        self.layInstrs.setSpacing(0)
+        self.layInstrs.setObjectName("layInstrs")
+        spacerItem = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.layInstrs.addItem(spacerItem)
+        self.horizontalLayout.addLayout(self.layInstrs)
+        self.tableMeasure = QtWidgets.QTableView(self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.tableMeasure.sizePolicy().hasHeightForWidth())
+        self.tableMeasure.setSizePolicy(sizePolicy)
+        self.tableMeasure.setObjectName("tableMeasure")
+        self.tableMeasure.horizontalHeader().setHighlightSections(False)
+        self.tableMeasure.verticalHeader().setVisible(False)
+        self.tableMeasure.verticalHeader().setHighlightSections(False)
+        self.horizontalLayout.addWidget(self.tableMeasure)
+        self.horizontalLayout.setStretch(0, 1)
+        self.horizontalLayout.setStretch(1, 3)
+        MainWindow.setCentralWidget(self.centralwidget)
+        self.menubar = QtWidgets.QMenuBar(MainWindow)
+        self.menubar.setGeometry(QtCore.QRect(0, 0, 1132, 21))
+        self.menubar.setObjectName("menubar")
+        self.menu = QtWidgets.QMenu(self.menubar)
+        self.menu.setObjectName("menu")
+        MainWindow.setMenuBar(self.menubar)
+        self.statusbar = QtWidgets.QStatusBar(MainWindow)
+        self.statusbar.setObjectName("statusbar")
+        MainWindow.setStatusBar(self.statusbar)
+        self.actHistory = QtWidgets.QAction(MainWindow)
+        self.actHistory.setObjectName("actHistory")
+        self.actExit = QtWidgets.QAction(MainWindow)
+        self.actExit.setObjectName("actExit")
+        self.menu.addAction(self.actHistory)
+        self.menu.addSeparator()
+        self.menu.addAction(self.actExit)
+        self.menubar.addAction(self.menu.menuAction())
+
+        self.retranslateUi(MainWindow)
+        self.actExit.triggered.connect(MainWindow.close) # type: ignore
+        QtCore.QMetaObject.connectSlotsByName(MainWindow)
+
+    def retranslateUi(self, MainWindow):
+        _translate = QtCore.QCoreApplication.translate
+        MainWindow.setWindowTitle(_translate("MainWindow", "Измерение параметров умножителей"))
+        self.menu.setTitle(_translate("MainWindow", "&Файл"))
+        self.actHistory.setText(_translate("MainWindow", "Открыть журнал..."))
+        self.actHistory.setToolTip(_translate("MainWindow", "Загрузить результаты прошлых измерений"))
+        self.actHistory.setStatusTip(_translate("MainWindow", "Загрузить результаты прошлых измерений"))
+        self.actExit.setText(_translate("MainWindow", "Выход"))
+        self.actExit.setToolTip(_translate("MainWindow", "Выйти из приложения"))
+        self.actExit.setStatusTip(_translate("MainWindow", "Выйти из приложения"))
+
+
+source_digest = 'bb18e18bd342e2924aa59f8a4352b5045f1cf982'
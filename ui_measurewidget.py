@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'measurewidget.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.11
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+class Ui_widgetMeasure(object):
+    def setupUi(self, widgetMeasure):
+        widgetMeasure.setObjectName("widgetMeasure")
+        widgetMeasure.resize(243, 62)
+        self.verticalLayout = QtWidgets.QVBoxLayout(widgetMeasure)
+        self.verticalLayout.setContentsMargins(-1, 2, -1, 2)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.grpParams = QtWidgets.QGroupBox(widgetMeasure)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Minimum)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.grpParams.sizePolicy().hasHeightForWidth())
+        self.grpParams.setSizePolicy(sizePolicy)
+        self.grpParams.setObjectName("grpParams")
+        self.layParams = QtWidgets.QVBoxLayout(self.grpParams)
+        self.layParams.setContentsMargins(0, 0, 6, 6)
+        self.layParams.setSpacing(2)
+        self.layParams.setObjectName("layParams")
+        self.horizontalLayout = QtWidgets.QHBoxLayout()
+        self.horizontalLayout.setContentsMargins(6, 6, 6, 6)
+        self.horizontalLayout.setObjectName("horizontalLayout")
+        spacerItem = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.horizontalLayout.addItem(spacerItem)
+        self.btnCheck = QtWidgets.QPushButton(self.grpParams)
+        self.btnCheck.setEnabled(False)
+        self.btnCheck.setObjectName("btnCheck")
+        self.horizontalLayout.addWidget(self.btnCheck)
+        self.btnMeasure = QtWidgets.QPushButton(self.grpParams)
+        self.btnMeasure.setEnabled(False)
+        self.btnMeasure.setObjectName("btnMeasure")
+        self.horizontalLayout.addWidget(self.btnMeasure)
+        self.btnJobs = QtWidgets.QPushButton(self.grpParams)
+        self.btnJobs.setEnabled(False)
+        self.btnJobs.setObjectName("btnJobs")
+        self.horizontalLayout.addWidget(self.btnJobs)
+        self.layParams.addLayout(self.horizontalLayout)
+        self.verticalLayout.addWidget(self.grpParams)
+
+        self.retranslateUi(widgetMeasure)
+        QtCore.QMetaObject.connectSlotsByName(widgetMeasure)
+
+    def retranslateUi(self, widgetMeasure):
+        _translate = QtCore.QCoreApplication.translate
+        widgetMeasure.setWindowTitle(_translate("widgetMeasure", "Form"))
+        self.grpParams.setTitle(_translate("widgetMeasure", "Параметры"))
+        self.btnCheck.setText(_translate("widgetMeasure", "Проверить"))
+        self.btnMeasure.setText(_translate("widgetMeasure", "Измерить"))
+        self.btnJobs.setText(_translate("widgetMeasure", "Очередь..."))
+
+
+source_digest = '179fdd8193fccbcb46e2776c22cd174a8293264f'
@@ -0,0 +1,55 @@
+import importlib
+import io
+import os
+import sys
+
+from tablecache import file_digest
+
+
+def _module_name(filename):
+    return 'ui_' + os.path.splitext(os.path.basename(filename))[0]
+
+
+def load_ui(filename, widget):
+    # pre-generated ui_<name>.py when it was built from the current .ui file, runtime parsing otherwise
+    try:
+        module = importlib.import_module(_module_name(filename))
+    except ImportError:
+        module = None
+
+    if module is not None and os.path.isfile(filename) and module.source_digest != file_digest(filename):
+        print(f'{filename} changed since {module.__name__}.py was generated, run uiloader.py')
+        module = None
+    if module is None:
+        from PyQt5 import uic
+        return uic.loadUi(filename, widget)
+
+    ui_class = next(v for k, v in vars(module).items() if k.startswith('Ui_'))
+    ui = ui_class()
+    ui.setupUi(widget)
+    # same attribute layout as uic.loadUi: child widgets are reachable from the widget itself
+    for k, v in vars(ui).items():
+        setattr(widget, k, v)
+    return widget
+
+
+def compile_ui(filename):
+    from PyQt5 import uic
+    source = io.StringIO()
+    with open(filename, 'rt', encoding='utf-8') as f:
+        uic.compileUi(f, source)
+    target = _module_name(filename) + '.py'
+    with open(os.path.join(os.path.dirname(filename), target), 'wt', encoding='utf-8') as f:
+        f.write(source.getvalue())
+        f.write(f'\n\nsource_digest = {file_digest(filename)!r}\n')
+    print(f'{filename} -> {target}')
+
+
+def main(args):
+    files = args or sorted(f for f in os.listdir('.') if f.endswith('.ui'))
+    for filename in files:
+        compile_ui(filename)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
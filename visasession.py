@@ -0,0 +1,54 @@
+import threading
+
+
+class VisaSessions:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rm = None
+        self._resources = dict()
+
+    @property
+    def resource_manager(self):
+        with self._lock:
+            if self._rm is None:
+                # VISA backend is loaded on the first connect, not at startup
+                import visa
+                self._rm = visa.ResourceManager()
+            return self._rm
+
+    def open(self, addr):
+        rm = self.resource_manager
+        with self._lock:
+            inst = self._resources.get(addr)
+        if inst is not None:
+            return inst
+        inst = rm.open_resource(addr)
+        with self._lock:
+            # another thread may have opened the same address meanwhile
+            if addr in self._resources:
+                inst.close()
+                return self._resources[addr]
+            self._resources[addr] = inst
+        return inst
+
+    def close(self, addr):
+        with self._lock:
+            inst = self._resources.pop(addr, None)
+        if inst is not None:
+            try:
+                inst.close()
+            except Exception as ex:
+                # a session to a rebooted instrument may be dead already
+                print('VISA close error:', ex)
+
+    def close_all(self):
+        with self._lock:
+            resources, self._resources = self._resources, dict()
+        for inst in resources.values():
+            try:
+                inst.close()
+            except Exception as ex:
+                print('VISA close error:', ex)
+
+
+sessions = VisaSessions()